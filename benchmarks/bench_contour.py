@@ -0,0 +1,56 @@
+'''times contour extraction with and without the contour cache and checks both give the same points
+
+Levels include one the field never reaches, which must yield no arrays on every path.
+
+usage: python benchmarks/bench_contour.py [--grid 300 1000]
+'''
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import timed
+from run_all import grid
+import difplot_v2 as dp
+
+LEVELS = [0.2, 0.5, 0.8, 5.0]
+
+
+def same_points(a, b):
+    '''True if two lists of (n, 2) vertex arrays hold the same vertices in the same order'''
+    return len(a) == len(b) and all(np.array_equal(p, q) for p, q in zip(a, b))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--grid', type=int, nargs='+', default=[300, 1000])
+    args = ap.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')
+    contours = [[level, ['r'], 'solid'] for level in LEVELS]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'grid':>6} {'path':>28} {'time [s]':>9} {'arrays':>7}")
+        for n in args.grid:
+            X, Y, Z = grid(n)
+            dp._CONTOUR_CACHE.clear()
+            folder = os.path.join(tmp, f'cache_{n}')
+            runs = {
+                'contour_points': lambda: dp.contour_points(X, Y, Z, LEVELS),
+                'contour_points cache (cold)': lambda: dp.contour_points(X, Y, Z, LEVELS, cache=folder),
+                'contour_points cache (disk)': lambda: dp._CONTOUR_CACHE.clear() or dp.contour_points(X, Y, Z, LEVELS, cache=folder),
+                'contour_points cache (hot)': lambda: dp.contour_points(X, Y, Z, LEVELS, cache=folder),
+                'contplot': lambda: dp.contplot(X, Y, Z, 'x', 'y', 'z', contours=contours, path=tmp + os.sep, name='c.png', returnPoints=True),
+                'contplot contourCache': lambda: dp.contplot(X, Y, Z, 'x', 'y', 'z', contours=contours, path=tmp + os.sep, name='c.png', returnPoints=True, contourCache=folder),
+            }
+            ref = None
+            for label, run in runs.items():
+                t, points = timed(run)
+                ref = points if ref is None else ref
+                assert same_points(points, ref), label
+                print(f'{n:>6} {label:>28} {t:>9.3f} {len(points):>7}')
+
+
+if __name__ == '__main__':
+    main()
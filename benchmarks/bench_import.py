@@ -0,0 +1,62 @@
+'''times importing difplot_v2 in a fresh interpreter and checks the data helpers never load matplotlib
+
+usage: python benchmarks/bench_import.py [--repeat 5]
+'''
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import write_scan, write_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#each case runs in its own interpreter and prints "<seconds> <matplotlib loaded>"
+CASES = {
+    'import': '',
+    'read': 'dp.read(SCAN, output=0)',
+    'read1D': 'dp.read1D(SCAN1D, output=0)',
+    'sample': 'dp.sample(np.loadtxt(TABLE)[:, :2], 100)',
+    'pyplot': 'import matplotlib.pyplot',
+}
+
+SCRIPT = '''
+import sys, time
+sys.path.insert(0, {root!r})
+SCAN, SCAN1D, TABLE = {scan!r}, {scan1d!r}, {table!r}
+t0 = time.perf_counter()
+import numpy as np
+import difplot_v2 as dp
+{call}
+print(time.perf_counter() - t0, 'matplotlib' in sys.modules)
+'''
+
+
+def run_case(call, scan, scan1d, table):
+    '''runs one case in a fresh interpreter, returns [seconds, whether matplotlib got imported]'''
+    out = subprocess.run([sys.executable, '-c', SCRIPT.format(root=ROOT, scan=scan, scan1d=scan1d, table=table, call=call)], check=True, capture_output=True, text=True)
+    seconds, loaded = out.stdout.split()[-2:]
+    return [float(seconds), loaded == 'True']
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scan = write_scan(os.path.join(tmp, 'scan'), 4, 200)
+        scan1d = write_scan(os.path.join(tmp, 'scan1d'), 4, 1, cols=1)
+        table = write_table(os.path.join(tmp, 'table.txt'), 1000, cols=2)
+        print(f"{'case':>8} {'best [s]':>9} {'matplotlib':>11}")
+        for case, call in CASES.items():
+            runs = [run_case(call, scan, scan1d, table) for _ in range(args.repeat)]
+            loaded = any(r[1] for r in runs)
+            print(f'{case:>8} {min(r[0] for r in runs):>9.3f} {str(loaded):>11}')
+            if case in ('import', 'read', 'read1D', 'sample'):
+                assert not loaded, f'{case} imported matplotlib'
+
+
+if __name__ == '__main__':
+    main()
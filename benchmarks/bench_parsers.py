@@ -0,0 +1,34 @@
+'''compares the text parser backends used by read()/read1D() on large single files
+
+usage: python benchmarks/bench_parsers.py [--rows 100000 1000000] [--cols 3]
+'''
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import timed, write_table
+import difplot_v2 as dp
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    ap.add_argument('--cols', type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>9} {'dtype':>8} {'parser':>10} {'time [s]':>9} {'speedup':>8}")
+        for rows in args.rows:
+            for dtype in (float, complex):
+                filename = write_table(os.path.join(tmp, f'{rows}.txt'), rows, cols=args.cols, dtype=dtype, nan_every=97)
+                ref_time, ref = timed(dp._parse, filename, dtype=dtype, parser='genfromtxt')
+                for parser in ('genfromtxt', 'loadtxt'):
+                    t, data = (ref_time, ref) if parser == 'genfromtxt' else timed(dp._parse, filename, dtype=dtype, parser=parser, repeat=2)
+                    assert np.array_equal(data, ref, equal_nan=True), parser
+                    print(f'{rows:>9} {np.dtype(dtype).name:>8} {parser:>10} {t:>9.3f} {ref_time / t:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
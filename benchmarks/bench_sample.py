@@ -0,0 +1,56 @@
+'''times sample() and its maxD spacing enforcement against the former point-by-point loop
+
+usage: python benchmarks/bench_sample.py [--points 1000000 10000000] [--N 2000] [--maxD 1e-3]
+'''
+import argparse
+
+import numpy as np
+
+from common import timed
+import difplot_v2 as dp
+
+
+def ode_curve(M, seed=0):
+    '''ODE-like test curve on [0, 1]: smooth background, a steep front and a little noise'''
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.random(M))
+    x[0], x[-1] = 0.0, 1.0
+    y = np.exp(-3 * x) + np.tanh((x - 0.5) * 400) + 1e-3 * rng.normal(size=M)
+    return np.column_stack((x, y))
+
+
+def enforce_maxD_loop(x, idx, maxD):
+    '''reference: the per-point loop sample() used before the batched _enforce_maxD'''
+    enforced = [idx[0]]
+    for j in idx[1:]:
+        while x[j] - x[enforced[-1]] > maxD:
+            mid = np.searchsorted(x, x[enforced[-1]] + maxD)
+            if mid >= j:
+                break
+            enforced.append(mid)
+        enforced.append(j)
+    return np.array(enforced)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--points', type=int, nargs='+', default=[1000000, 10000000])
+    ap.add_argument('--N', type=int, default=2000)
+    ap.add_argument('--maxD', type=float, nargs='+', default=[1e-3, 1e-5])
+    args = ap.parse_args()
+
+    print(f"{'points':>9} {'maxD':>7} {'loop [s]':>9} {'batched [s]':>11} {'speedup':>8} {'sample [s]':>10}")
+    for M in args.points:
+        data = ode_curve(M)
+        x = data[:, 0]
+        idx = np.unique(np.linspace(0, M - 1, args.N // 4, dtype=int))
+        for maxD in args.maxD:
+            t_loop, ref = timed(enforce_maxD_loop, x, idx, maxD)
+            t_vec, out = timed(dp._enforce_maxD, x, idx, maxD, repeat=3)
+            assert np.array_equal(ref, out)
+            t_sample, _ = timed(dp.sample, data, args.N, maxD=maxD, max_iter=10)
+            print(f'{M:>9} {maxD:>7.0e} {t_loop:>9.3f} {t_vec:>11.4f} {t_loop / t_vec:>7.1f}x {t_sample:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
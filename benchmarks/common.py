@@ -0,0 +1,38 @@
+'''shared helpers for the benchmark scripts: synthetic data and timing'''
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    '''runs func repeat times and returns [best wall time in seconds, last result]'''
+    best, result = np.inf, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return [best, result]
+
+
+def write_table(filename, rows, cols=3, dtype=float, nan_every=0, seed=0):
+    '''writes a rows x cols numeric text file like the solver output, optionally sprinkling NaNs'''
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(rows, cols))
+    if np.issubdtype(np.dtype(dtype), np.complexfloating):
+        data = data + 1j * rng.normal(size=(rows, cols))
+    if nan_every:
+        data[::nan_every, -1] = np.nan
+    np.savetxt(filename, data)
+    return filename
+
+
+def write_scan(folder, nfiles, rows, cols=3, nan_every=0, seed=0):
+    '''writes a scan directory of <mass>.txt files and returns the path prefix expected by read()'''
+    os.makedirs(folder, exist_ok=True)
+    for i, m in enumerate(np.logspace(-3, 3, nfiles)):
+        write_table(os.path.join(folder, f'{m:.3e}.txt'), rows, cols=cols, nan_every=nan_every, seed=seed + i)
+    return folder + os.sep
@@ -0,0 +1,200 @@
+'''benchmark suite: read, read1D, sample and every plotting entry point on synthetic data
+
+Every case runs in a fresh interpreter, so the peak RSS it reports is its own. Results
+(wall time, peak RSS, output file size) are written as JSON; --compare diffs two such
+files, e.g. one per commit, and exits with status 1 if any case got slower than the
+threshold allows.
+
+usage: python benchmarks/run_all.py [--scale small|medium|large] [--only read sample ...] [--out results.json]
+       python benchmarks/run_all.py --compare old.json new.json [--threshold 0.1]
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from bench_sample import ode_curve
+from common import timed, write_scan
+import difplot_v2 as dp
+
+#points per curve, files per scan directory and grid side length for each scale
+SCALES = {
+    'small': {'points': [1000, 10000], 'files': [10, 100], 'grid': [100, 300]},
+    'medium': {'points': [100000, 1000000], 'files': [500, 1000], 'grid': [500, 1000]},
+    'large': {'points': [10000000], 'files': [5000], 'grid': [2000]},
+}
+ENTRIES = ['read', 'read1D', 'sample', 'difplot', 'difplot-decimate', 'difSubPlot', 'contplot', 'colplot']
+#vector output of more curve points than this is dominated by writing the file, the decimate case covers it
+RAW_PLOT_POINTS = 1000000
+
+
+def grid(n):
+    '''n x n test field on [0.1, 1]^2 with closed and open contours'''
+    x = np.linspace(0.1, 1, n)
+    X, Y = np.meshgrid(x, x)
+    return [X, Y, np.sin(6 * X) * np.cos(5 * Y) + X * Y]
+
+
+def cases(scale, only=None):
+    '''list of case dicts for a scale, one per entry point and data size'''
+    sizes = SCALES[scale]
+    out = []
+    for entry in only or ENTRIES:
+        if entry in ('read', 'read1D'):
+            key = 'files'
+        elif entry in ('contplot', 'colplot'):
+            key = 'grid'
+        else:
+            key = 'points'
+        for n in sizes[key]:
+            if entry in ('difplot', 'difSubPlot') and n > RAW_PLOT_POINTS:
+                continue
+            out.append({'case': f'{entry}/{key}={n}', 'entry': entry, 'size': n})
+    return out
+
+
+def prepare(case, data, out):
+    '''returns [function, args, kwargs, output file or None] for a case; the data is built before timing'''
+    entry, n = case['entry'], case['size']
+    if entry == 'read':
+        return [dp.read, (os.path.join(data, f'scan_{n}') + os.sep,), {}, None]
+    if entry == 'read1D':
+        return [dp.read1D, (os.path.join(data, f'scan1d_{n}') + os.sep,), {}, None]
+    if entry == 'sample':
+        return [dp.sample, (ode_curve(n), 2000), {}, None]
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401, imported here so its cost is not timed
+    if entry in ('difplot', 'difplot-decimate'):
+        c = ode_curve(n)
+        kwargs = {'path': out, 'name': 'difplot', 'decimate': entry == 'difplot-decimate'}
+        return [dp.difplot, ([c[:, 1], 2 * c[:, 1]], [c[:, 0], c[:, 0]], 'x', ['y', 'a', 'b']), kwargs, os.path.join(out, 'difplot.pdf')]
+    if entry == 'difSubPlot':
+        c = ode_curve(n)
+        ylist, xlist = [[c[:, 1], 2 * c[:, 1]]] * 2, [[c[:, 0], c[:, 0]]] * 2
+        kwargs = {'path': out, 'name': 'difSubPlot', 'leg': [['best', 10], ['best', 10]]}
+        return [dp.difSubPlot, (ylist, xlist, ['x', 'x'], [['y', 'a', 'b'], ['y', 'a', 'b']]), kwargs, os.path.join(out, 'difSubPlot.jpeg')]
+    X, Y, Z = grid(n)
+    contours = [[level, ['r', 'b'], 'solid', 'dashed'] for level in (0.2, 0.5, 0.8)]
+    kwargs = {'contours': contours, 'zlist2': [Z ** 2], 'leg': ['best', 10, ['z2']], 'path': out, 'name': entry}
+    if entry == 'colplot':
+        kwargs['usetex'] = False
+    return [getattr(dp, entry), (X, Y, Z, 'x', 'y', 'z'), kwargs, os.path.join(out, entry + '.pdf')]
+
+
+def peak_rss_mb():
+    '''peak resident set size of this process in MB (ru_maxrss is kB on Linux, bytes on macOS)'''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+def run_case(case, data):
+    '''runs one case in this process and returns its result record'''
+    with tempfile.TemporaryDirectory() as out:
+        func, args, kwargs, filename = prepare(case, data, out + os.sep)
+        before = peak_rss_mb()
+        seconds, _ = timed(func, *args, **kwargs)
+        after = peak_rss_mb()
+        size = os.path.getsize(filename) if filename else None
+    return dict(case, time=seconds, peak_rss_mb=after, rss_increase_mb=after - before, output_bytes=size)
+
+
+def spawn(case, data, repeat):
+    '''runs a case repeat times, each in a fresh interpreter, keeps the best time and the largest peak RSS'''
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', json.dumps(case), '--data', data], check=True, capture_output=True, text=True)
+        runs.append(json.loads(out.stdout.splitlines()[-1]))
+    best = min(runs, key=lambda r: r['time'])
+    best['peak_rss_mb'] = max(r['peak_rss_mb'] for r in runs)
+    return best
+
+
+def write_data(folder, scale, only=None):
+    '''writes the scan directories a scale needs into folder, reusing ones already there'''
+    for case in cases(scale, only):
+        n = case['size']
+        if case['entry'] == 'read' and not os.path.isdir(os.path.join(folder, f'scan_{n}')):
+            write_scan(os.path.join(folder, f'scan_{n}'), n, 200)
+        if case['entry'] == 'read1D' and not os.path.isdir(os.path.join(folder, f'scan1d_{n}')):
+            write_scan(os.path.join(folder, f'scan1d_{n}'), n, 1, cols=1)
+
+
+def metadata(scale):
+    '''where and on what the results were measured'''
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import matplotlib
+        mpl_version = matplotlib.__version__
+    except ImportError:
+        mpl_version = None
+    return {'scale': scale, 'commit': commit, 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__, 'matplotlib': mpl_version,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def compare(old_file, new_file, threshold=0.1):
+    '''prints old vs new per case, returns the number of cases slower than 1 + threshold times the old time'''
+    with open(old_file) as f:
+        old = {r['case']: r for r in json.load(f)['results']}
+    with open(new_file) as f:
+        new = {r['case']: r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"{'case':>28} {'old [s]':>9} {'new [s]':>9} {'ratio':>7} {'old RSS':>8} {'new RSS':>8} {'old bytes':>10} {'new bytes':>10}")
+    for key in [k for k in new if k in old]:
+        o, n = old[key], new[key]
+        ratio = n['time'] / o['time'] if o['time'] else np.inf
+        flag = ' !' if ratio > 1 + threshold else ''
+        regressions += bool(flag)
+        print(f"{key:>28} {o['time']:>9.3f} {n['time']:>9.3f} {ratio:>6.2f}x {o['peak_rss_mb']:>8.0f} {n['peak_rss_mb']:>8.0f} "
+              f"{str(o['output_bytes']):>10} {str(n['output_bytes']):>10}{flag}")
+    for key in sorted(set(old) ^ set(new)):
+        print(f"{key:>28} only in {'old' if key in old else 'new'}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--scale', choices=list(SCALES), default='small')
+    ap.add_argument('--only', nargs='+', choices=ENTRIES, help='entry points to run (default: all)')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--out', default='benchmark_results.json')
+    ap.add_argument('--data', help='folder for the synthetic scan directories, kept between runs (default: temporary)')
+    ap.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    ap.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown for --compare')
+    ap.add_argument('--case', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case), args.data)))
+        return
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = args.data or tmp
+        write_data(data, args.scale, args.only)
+        results = []
+        print(f"{'case':>28} {'time [s]':>9} {'peak RSS [MB]':>14} {'output [bytes]':>15}")
+        for case in cases(args.scale, args.only):
+            r = spawn(case, data, args.repeat)
+            results.append(r)
+            print(f"{r['case']:>28} {r['time']:>9.3f} {r['peak_rss_mb']:>14.0f} {str(r['output_bytes']):>15}")
+    with open(args.out, 'w') as f:
+        json.dump({'meta': metadata(args.scale), 'results': results}, f, indent=1)
+    print(f'results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
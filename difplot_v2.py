@@ -1,56 +1,496 @@
 '''imports'''
 import os
+import bisect
 import glob
+import heapq
+import hashlib
+import json
 import math
 import random
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from itertools import islice
+from pathlib import Path as _Path
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from matplotlib import cm, colors
-from matplotlib.lines import Line2D
-from matplotlib.font_manager import FontProperties
-from matplotlib.patches import Polygon, PathPatch
-from matplotlib.path import Path
-from mpl_toolkits.axes_grid1.inset_locator import zoomed_inset_axes, mark_inset
-from matplotlib.ticker import LogLocator, AutoMinorLocator, MultipleLocator
+#matplotlib is imported inside the plotting functions, so read, read1D and sample never load it
 
 
-def _configure_rcparams(fontSize=14, font='serif', borderWidth=1, tickSize=1, tickDirection='in', usetex=False, xtop=True, ytop=True, labelSize=None):
-    """Configure common matplotlib rcParams used by plotting helpers.
+class Timings:
+    """
+    Wall time and item count per internal stage of read, read1D and the plot functions.
 
-    Kept small and explicit to avoid repeating large rc blocks.
+    Pass one as timings= and it is filled in place. The stages are discover, parse,
+    filter, sort and stack for the readers, and scale, draw, contour, legend and save for
+    the plots (matplotlib renders lazily, so drawing text, LaTeX included, shows up in
+    save). A stage hit more than once accumulates, parse and filter are summed over
+    files and can exceed the wall time with workers. callback(name, seconds, items),
+    if given, is called on every record. Overhead is one perf_counter call per stage.
     """
-    plt.rcParams.update({'font.size': fontSize, 'font.family': font})
-    plt.rcParams['axes.linewidth'] = borderWidth
+
+    def __init__(self, callback=None):
+        self.stages = OrderedDict()
+        self.callback = callback
+        self._t0 = time.perf_counter()
+
+    def record(self, name, seconds, items=0):
+        """Add seconds and items to stage name."""
+        stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'items': 0})
+        stage['seconds'] += seconds
+        stage['calls'] += 1
+        stage['items'] += items
+        if self.callback is not None:
+            self.callback(name, seconds, items)
+
+    @contextmanager
+    def stage(self, name, items=0):
+        """Time the with block as stage name."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, items)
+
+    def lap(self, name=None, items=0):
+        """Record the time since the previous lap as stage name; without a name only restart the clock."""
+        now = time.perf_counter()
+        if name is not None:
+            self.record(name, now - self._t0, items)
+        self._t0 = now
+
+    def total(self):
+        return sum(stage['seconds'] for stage in self.stages.values())
+
+    def to_dict(self):
+        return {name: dict(stage) for name, stage in self.stages.items()}
+
+    def to_json(self, filename=None, **kwargs):
+        """The stages as a JSON string, also written to filename if given."""
+        text = json.dumps(self.to_dict(), **kwargs)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(text)
+        return text
+
+    def __repr__(self):
+        rows = [f'{name:>10} {stage["seconds"]:>10.4f} s {stage["calls"]:>6} calls {stage["items"]:>10} items' for name, stage in self.stages.items()]
+        return '\n'.join(['Timings'] + rows)
+
+
+def _lap(timings, name=None, items=0):
+    """Timings.lap that does nothing when timings is None."""
+    if timings is not None:
+        timings.lap(name, items)
+
+
+#rcParams contplot and colplot add on top of the common ones
+_CONTPLOT_RC = (
+    ('font.family', 'Times New Roman'),
+    ('mathtext.fontset', 'cm'),  # Computer Modern
+    ('mathtext.rm', 'Times New Roman'),
+    ('mathtext.it', 'Times New Roman:italic'),
+    ('font.weight', 'normal'),
+    ('axes.labelweight', 'normal'),
+    ('mathtext.default', 'regular'),  # Ensure math text is not bold
+)
+_COLPLOT_RC = (
+    ('font.family', 'serif'),
+    ('text.latex.preamble', r'\usepackage{amsmath}'),
+)
+
+
+@lru_cache(maxsize=64)
+def _rcparams(fontSize=14, font='serif', borderWidth=1, tickSize=1, tickDirection='in', usetex=False, xtop=True, ytop=True, labelSize=None, extra=()):
+    """Build (once per argument set) the rcParams dict used by the plotting helpers."""
+    rc = {'font.size': fontSize, 'font.family': font, 'axes.linewidth': borderWidth}
 
     # tick sizes
-    plt.rcParams['xtick.major.size'] = 12 * tickSize
-    plt.rcParams['xtick.major.width'] = 2 * tickSize
-    plt.rcParams['xtick.minor.size'] = 8 * tickSize
-    plt.rcParams['xtick.minor.width'] = 2 * tickSize
-
-    plt.rcParams['ytick.major.size'] = 12 * tickSize
-    plt.rcParams['ytick.major.width'] = 2 * tickSize
-    plt.rcParams['ytick.minor.size'] = 8 * tickSize
-    plt.rcParams['ytick.minor.width'] = 2 * tickSize
-
-    if labelSize is not None:
-        plt.rcParams['xtick.labelsize'] = labelSize
-        plt.rcParams['ytick.labelsize'] = labelSize
+    for axis in ('xtick', 'ytick'):
+        rc[axis + '.major.size'] = 12 * tickSize
+        rc[axis + '.major.width'] = 2 * tickSize
+        rc[axis + '.minor.size'] = 8 * tickSize
+        rc[axis + '.minor.width'] = 2 * tickSize
+        rc[axis + '.labelsize'] = fontSize if labelSize is None else labelSize
+        rc[axis + '.direction'] = tickDirection
+
+    rc['xtick.top'] = xtop
+    rc['ytick.right'] = ytop
+    rc['axes.unicode_minus'] = False
+    rc['text.usetex'] = usetex
+    rc.update(extra)
+    return rc
+
+
+def _configure_rcparams(fontSize=14, font='serif', borderWidth=1, tickSize=1, tickDirection='in', usetex=False, xtop=True, ytop=True, labelSize=None, extra=()):
+    """Scoped matplotlib rcParams for the plotting helpers.
+
+    Returns a context manager: the settings apply inside the with block only and the
+    previous rcParams are restored on exit, so one plot's style (LaTeX in particular)
+    never leaks into the next. extra holds helper-specific (key, value) pairs.
+    """
+    import matplotlib as mpl
+    return mpl.rc_context(_rcparams(fontSize, font, borderWidth, tickSize, tickDirection, usetex, xtop, ytop, labelSize, tuple(extra)))
+
+
+@lru_cache(maxsize=1)
+def _mathtext_parser():
+    """Shared mathtext parser used to test labels."""
+    from matplotlib.mathtext import MathTextParser
+    return MathTextParser('path')
+
+
+@lru_cache(maxsize=4096)
+def _needs_latex(label):
+    """True if label uses constructs only a real LaTeX run renders (mathtext would fail or print them literally)."""
+    # commands outside $...$ are only interpreted by LaTeX
+    if any('\\' in part for part in label.split('$')[::2]):
+        return True
+    if label.count('$') < 2:
+        return False
+    try:
+        _mathtext_parser().parse(label)
+    except ValueError:
+        return True
+    return False
+
+
+def _resolve_usetex(usetex, labels):
+    """Turn usetex='auto' into True or False from the labels a plot will draw."""
+    if usetex != 'auto':
+        return usetex
+    return any(_needs_latex(str(label)) for label in labels if label is not None)
+
+
+def set_tex_cache(folder):
+    """Point matplotlib's persistent LaTeX cache at folder.
+
+    usetex rendering already caches every TeX fragment on disk, keyed by a hash of the
+    string, font size and preamble, and reuses it across processes and runs. Putting
+    that cache on a shared folder lets every worker of a batch reuse the same
+    fragments instead of each node running latex for them again. This changes the
+    setting for the whole process; colplot(texCache=...) only changes it for one plot.
+    """
+    from matplotlib.texmanager import TexManager
+    os.makedirs(folder, exist_ok=True)
+    if hasattr(TexManager, '_cache_dir'):
+        TexManager._cache_dir = _Path(folder)
     else:
-        plt.rcParams['xtick.labelsize'] = fontSize
-        plt.rcParams['ytick.labelsize'] = fontSize
+        TexManager._texcache = str(folder)
+
+
+@contextmanager
+def _scoped_tex_cache(folder=None):
+    """set_tex_cache(folder) for the with block only, the previous cache folder is restored on exit."""
+    if folder is None:
+        yield
+        return
+    from matplotlib.texmanager import TexManager
+    attr = '_cache_dir' if hasattr(TexManager, '_cache_dir') else '_texcache'
+    previous = getattr(TexManager, attr, None)
+    set_tex_cache(folder)
+    try:
+        yield
+    finally:
+        setattr(TexManager, attr, previous)
+
 
-    plt.rcParams['xtick.direction'] = tickDirection
-    plt.rcParams['ytick.direction'] = tickDirection
-    plt.rcParams['xtick.top'] = xtop
-    plt.rcParams['ytick.right'] = ytop
-    plt.rcParams['axes.unicode_minus'] = False
-    plt.rcParams['text.usetex'] = usetex
+def _first_color(c):
+    """First colour of a contour colour entry, which is either one colour or a list of them."""
+    return c if isinstance(c, str) else c[0]
 
 
-def difplot(ylist,xlist,xlabel,ylabels,figx = 15,figy = 10,fontSize=40,DPI = 300,tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap = None,yflip=False,xscale='linear',yscale='linear',name='dif.png',xscaled=1,yscaled=1,Mline=False,xspan=[],yspan=[],linestyle=None,path='',top = False,Loc='best',vertical = None,leg=['best','10'],xminor=0,yminor=0,text=None,numTicksy=50,numTicksx = 50,yTicks=[],xTicks=[],fill = [],usetex = False):
+def _cached_contour_set(ax, x, y, levels, lines, **kwargs):
+    """ContourSet drawn from precomputed [vertices, codes] per level, with the axes limits ax.contour would set."""
+    from matplotlib.contour import ContourSet
+    if not any(len(vertices) for vertices, codes in lines):
+        return None
+    cs = ContourSet(ax, levels, [vertices for vertices, codes in lines], [codes for vertices, codes in lines], **kwargs)
+    mins, maxs = [np.nanmin(x), np.nanmin(y)], [np.nanmax(x), np.nanmax(y)]
+    cs.sticky_edges.x[:] = [mins[0], maxs[0]]
+    cs.sticky_edges.y[:] = [mins[1], maxs[1]]
+    ax.update_datalim([mins, maxs])
+    ax.autoscale_view(tight=True)
+    return cs
+
+
+def _contour_levels(ax, x, y, z, levels, colors, linestyles, algorithm=None, cache=False, **kwargs):
+    """Contour z at every level in a single pass.
+
+    Returns [list of ContourSets, segments per level in the order of levels]. Each level
+    keeps its own colour and linestyle; levels are sorted for matplotlib and mapped back.
+    Repeated levels cannot share one call and fall back to one call per level. With
+    cache set the lines come from _contour_lines and are only drawn here; a field with
+    no lines at any level is left to matplotlib, which still sets the axes limits.
+    """
+    import matplotlib as mpl
+    order = np.argsort(levels, kind='stable')
+    sortedLevels = np.asarray(levels, dtype=float)[order]
+    lines = _contour_lines(x, y, z, levels, algorithm=algorithm or mpl.rcParams['contour.algorithm'], cache=cache) if cache else []
+    if any(len(ln[0]) for ln in lines):
+        if np.any(np.diff(sortedLevels) <= 0):
+            sets = [_cached_contour_set(ax, x, y, [L], [ln], colors=[c], linestyles=[ls], **kwargs) for L, ln, c, ls in zip(levels, lines, colors, linestyles)]
+        else:
+            sets = [_cached_contour_set(ax, x, y, sortedLevels, [lines[i] for i in order], colors=[colors[i] for i in order], linestyles=[linestyles[i] for i in order], **kwargs)]
+        return [[cs for cs in sets if cs is not None], [ln[0] for ln in lines]]
+    #allsegs holds one empty (0, 2) array for a level without lines, dropped so the segments match _contour_lines
+    if np.any(np.diff(sortedLevels) <= 0):
+        sets = [ax.contour(x, y, z, levels=[L], colors=[c], linestyles=[ls], algorithm=algorithm, **kwargs) for L, c, ls in zip(levels, colors, linestyles)]
+        return [sets, [[s for s in cs.allsegs[0] if len(s)] for cs in sets]]
+    cs = ax.contour(x, y, z, levels=sortedLevels, colors=[colors[i] for i in order], linestyles=[linestyles[i] for i in order], algorithm=algorithm, **kwargs)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return [[cs], [[s for s in cs.allsegs[r] if len(s)] for r in rank]]
+
+
+def _draw_contours(ax, xlist, ylist, zlist, zlist2, contours, zlabel, leg, lineWidth=1.5, inLine=False, legend_boolean=None, returnPoints=False, algorithm=None, cache=False):
+    """Draw the contplot/colplot contour families, returns [legend_lines, legend_labels, contour_points].
+
+    Each entry C of contours is [level, colours, linestyle of zlist, linestyle of zlist2[0], ...],
+    with colours[0] for zlist and colours[j + 1] for zlist2[j]. Every field is contoured
+    once for all levels; legend entries and contour points keep the per-level order.
+    cache memoizes the contour lines per grid (see _contour_lines).
+    """
+    from matplotlib.lines import Line2D
+    if legend_boolean is None:
+        legend_boolean = [True] * len(contours[0][1])
+    levels = [C[0] for C in contours]
+    fields = [(zlist, [_first_color(C[1]) for C in contours], [C[2] for C in contours], zlabel, {'linewidths': lineWidth})]
+    for j in range(0, len(zlist2)):
+        #zlist2 labels are only needed for clabel or a legend entry, leg may not hold them otherwise
+        label = leg[2][j] if len(leg) > 2 and j < len(leg[2]) else None
+        fields.append((zlist2[j], [C[1][j+1] for C in contours], [C[j+3] for C in contours], label, {}))
+
+    segs = []
+    for z, colors, linestyles, label, kwargs in fields:
+        sets, fieldSegs = _contour_levels(ax, xlist, ylist, z, levels, colors, linestyles, algorithm=algorithm, cache=cache, **kwargs)
+        if inLine == True:
+            for cs in sets:
+                ax.clabel(cs, inline=True, fontsize=leg[1], fmt=label)
+        segs.append(fieldSegs)
+
+    legend_lines, legend_labels, contour_points = [], [], []
+    for i in range(len(contours)):
+        for f, (z, colors, linestyles, label, kwargs) in enumerate(fields):
+            if inLine != True and legend_boolean[f] == True:
+                legend_lines.append(Line2D([0], [0], color=colors[i], linestyle=linestyles[i], linewidth=lineWidth))
+                legend_labels.append(label)
+            if returnPoints == True:
+                contour_points.extend(np.array(s) for s in segs[f][i])  # (n, 2) arrays of (x, y) vertices, copied off the contour cache
+    return [legend_lines, legend_labels, contour_points]
+
+
+#in-memory LRU of contour lines keyed by (grid digest, level, algorithm), see _contour_lines
+_CONTOUR_CACHE = OrderedDict()
+_CONTOUR_CACHE_SIZE = 512
+
+
+def _array_digest(*arrays):
+    """sha1 over the shapes, float64 contents and masks of arrays."""
+    h = hashlib.sha1()
+    for a in arrays:
+        #ascontiguousarray drops the mask of a masked array, so it is hashed separately
+        mask = np.ma.getmaskarray(a)
+        a = np.ascontiguousarray(a, dtype=float)
+        h.update(str(a.shape).encode())
+        h.update(a.tobytes())
+        h.update(np.packbits(mask).tobytes())
+    return h.hexdigest()
+
+
+def _contour_generator(xlist, ylist, zlist, algorithm='mpl2014'):
+    """contourpy generator set up the way matplotlib's contour sets it up."""
+    import contourpy
+    x, y = np.asarray(xlist, dtype=float), np.asarray(ylist, dtype=float)
+    if x.ndim == 1 and y.ndim == 1:
+        x, y = np.meshgrid(x, y)
+    z = np.ma.masked_invalid(np.ma.asarray(zlist, dtype=float), copy=False)
+    return contourpy.contour_generator(x, y, z, name=algorithm, corner_mask=algorithm != 'mpl2005', line_type=contourpy.LineType.SeparateCode)
+
+
+def _contour_lines(xlist, ylist, zlist, levels, algorithm='mpl2014', cache=False):
+    """
+    [vertex arrays, path code arrays] for every level, optionally memoized on grid content.
+
+    cache = True keeps results in an in-memory LRU keyed by a hash of the grid, the level
+    and the algorithm, so restyling the same grid skips contouring; a folder name also
+    stores them there as .npz files shared across runs.
+    """
+    levels = [float(level) for level in np.atleast_1d(levels)]
+    digest = _array_digest(xlist, ylist, zlist) if cache else None
+    lines, gen = [], None
+    for level in levels:
+        key = (digest, level, algorithm)
+        entry = None
+        if cache and key in _CONTOUR_CACHE:
+            _CONTOUR_CACHE.move_to_end(key)
+            entry = _CONTOUR_CACHE[key]
+        filename = None
+        if cache and cache is not True:
+            filename = os.path.join(cache, hashlib.sha1(repr(key).encode()).hexdigest() + '.npz')
+            if entry is None and os.path.exists(filename):
+                with np.load(filename) as f:
+                    offsets = f['offsets']
+                    #a level the field never reaches is stored as offsets [0], np.split would give one empty array
+                    if len(offsets) == 1:
+                        entry = [[], []]
+                    else:
+                        entry = [np.split(f['vertices'], offsets[1:-1]), np.split(f['codes'], offsets[1:-1])]
+        if entry is None:
+            if gen is None:
+                gen = _contour_generator(xlist, ylist, zlist, algorithm)
+            entry = list(gen.lines(level))
+            if filename is not None:
+                os.makedirs(cache, exist_ok=True)
+                offsets = np.concatenate(([0], np.cumsum([len(v) for v in entry[0]])))
+                vertices = np.concatenate(entry[0]) if entry[0] else np.empty((0, 2))
+                codes = np.concatenate(entry[1]) if entry[1] else np.empty(0, dtype=np.uint8)
+                #written under a temporary name and renamed, so a worker sharing the folder never loads half a file
+                tmp = f'{filename}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    np.savez(f, vertices=vertices, codes=codes, offsets=offsets)
+                os.replace(tmp, filename)
+        if cache:
+            #cached arrays are shared by every later call, so they are frozen and handed out as copies
+            for a in entry[0] + entry[1]:
+                a.flags.writeable = False
+            _CONTOUR_CACHE[key] = entry
+            while len(_CONTOUR_CACHE) > _CONTOUR_CACHE_SIZE:
+                _CONTOUR_CACHE.popitem(last=False)
+        lines.append(entry)
+    return lines
+
+
+def contour_points(xlist, ylist, zlist, levels, algorithm='mpl2014', cache=False):
+    """
+    Contour vertices of a grid, computed directly with contourpy and without a figure.
+
+    Parameters
+    ----------
+    xlist, ylist : np.ndarray
+        Grid coordinates, 1D axes or 2D arrays shaped like zlist.
+    zlist : np.ndarray
+        2D field to contour, NaNs are masked as in matplotlib.
+    levels : float or sequence of float
+        Contour level(s).
+    algorithm : str
+        contourpy algorithm, as the algorithm argument of contplot.
+    cache : bool or str
+        Memoize the lines per (grid content, level, algorithm) in memory (True)
+        or in memory and in the given folder.
+
+    Returns
+    -------
+    list of np.ndarray
+        (n, 2) vertex arrays for every level in the given order, none for a level
+        without lines; the same list contplot(..., returnPoints=True) gives for a
+        single field, with or without contourCache.
+    """
+    points = []
+    for vertices, codes in _contour_lines(xlist, ylist, zlist, levels, algorithm=algorithm, cache=cache):
+        points.extend(np.array(v) for v in vertices)
+    return points
+
+
+def _grid_axes(xlist, ylist, zlist):
+    """Return the 1D x and y axes if (xlist, ylist) is a rectilinear grid for zlist, else None."""
+    x, y, z = np.asarray(xlist), np.asarray(ylist), np.asarray(zlist)
+    if z.ndim != 2:
+        return None
+    if x.ndim == 2 and y.ndim == 2:
+        if x.shape != z.shape or y.shape != z.shape:
+            return None
+        if not (np.all(x == x[0]) and np.all(y == y[:, :1])):
+            return None
+        x, y = x[0], y[:, 0]
+    if x.ndim != 1 or y.ndim != 1:
+        return None
+    if len(x) not in (z.shape[1], z.shape[1] + 1) or len(y) not in (z.shape[0], z.shape[0] + 1):
+        return None
+    return x, y
+
+
+def _is_even(a):
+    """True for increasing, evenly spaced 1D axes."""
+    d = np.diff(a)
+    return len(d) > 0 and d[0] > 0 and np.allclose(d, d[0], rtol=1e-6, atol=0)
+
+
+def _heatmap(ax, xlist, ylist, zlist, cmap=None, norm=None, method='auto', rasterized=False, xscale='linear', yscale='linear'):
+    """Draw the colplot heatmap with the cheapest artist that gives the same picture.
+
+    pcolor builds one Polygon per cell; pcolormesh draws one mesh for rectilinear grids
+    and imshow a single image for evenly spaced grids on linear axes.
+    """
+    axes = _grid_axes(xlist, ylist, zlist)
+    if method == 'auto':
+        if axes is None:
+            method = 'pcolor'
+        elif xscale == 'linear' and yscale == 'linear' and _is_even(axes[0]) and _is_even(axes[1]):
+            method = 'imshow'
+        else:
+            method = 'pcolormesh'
+    if method == 'pcolor':
+        return ax.pcolor(xlist, ylist, zlist, cmap=cmap, shading='auto', norm=norm, rasterized=rasterized)
+    if method == 'pcolormesh':
+        return ax.pcolormesh(xlist, ylist, zlist, cmap=cmap, shading='auto', norm=norm, rasterized=rasterized)
+    if method != 'imshow':
+        raise ValueError(f"heatmap must be 'auto', 'pcolor', 'pcolormesh' or 'imshow', got {method!r}")
+    if axes is None or not (_is_even(axes[0]) and _is_even(axes[1])):
+        raise ValueError("heatmap='imshow' needs an evenly spaced, increasing grid")
+    z = np.asarray(zlist)
+    extent = []
+    for a, n in ((axes[0], z.shape[1]), (axes[1], z.shape[0])):
+        # cell centres (as pcolor's shading='auto') or cell edges
+        half = (a[1] - a[0]) / 2 if len(a) == n else 0
+        extent += [a[0] - half, a[-1] + half]
+    return ax.imshow(z, cmap=cmap, norm=norm, origin='lower', extent=extent, aspect='auto', interpolation='nearest', rasterized=rasterized)
+
+
+def _new_figure(fig=None, figx=15, figy=10):
+    '''returns the figure to draw into: a new pyplot figure, or fig cleared and resized for reuse'''
+    import matplotlib.pyplot as plt
+    if fig is None:
+        return plt.figure(figsize=[figx, figy])
+    fig.clear()
+    fig.set_size_inches(figx, figy)
+    return fig
+
+
+def _finish_figure(fig, reused=False, close=True, returnFig=False):
+    '''closes a figure the helper created once it is saved, returns it instead when asked to'''
+    if returnFig:
+        return fig
+    if close and not reused:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    return None
+
+
+def _decimate(x, y, max_points=None, figx=15, DPI=300, xscale='linear'):
+    '''min/max (M4) decimation of one series for plotting, returns [x, y] untouched when already small enough'''
+    #each pixel column keeps its first, last, lowest and highest point, so the rendered line is unchanged;
+    #columns are equal width in log10(x) on a log axis, and unsorted x (parametric curves) is left alone
+    x, y = np.asarray(x), np.asarray(y)
+    if max_points is None:
+        max_points = int(4 * figx * DPI)
+    if x.ndim != 1 or x.shape != y.shape or len(x) <= max_points:
+        return [x, y]
+    xs = x
+    if xscale == 'log':
+        if not np.all(x > 0):
+            return [x, y]
+        xs = np.log10(x)
+    if not np.all(np.diff(xs) >= 0):
+        return [x, y]
+    idx = _minmax_idx(xs, y, max_points)
+    return [x[idx], y[idx]]
+
+
+def difplot(ylist,xlist,xlabel,ylabels,figx = 15,figy = 10,fontSize=40,DPI = 300,tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap = None,yflip=False,xscale='linear',yscale='linear',name='dif.png',xscaled=1,yscaled=1,Mline=False,xspan=[],yspan=[],linestyle=None,path='',top = False,Loc='best',vertical = None,leg=['best','10'],xminor=0,yminor=0,text=None,numTicksy=50,numTicksx = 50,yTicks=[],xTicks=[],fill = [],usetex = False,decimate = False,max_points = None,fig = None,close = True,returnFig = False,timings = None):
     '''plots a solved differential equation'''
     '''======PARAMETERS======'''
     #ylist takes an array of arrays, each entry is a list of yvalues to be plotted. Same for xlist
@@ -60,575 +500,948 @@ def difplot(ylist,xlist,xlabel,ylabels,figx = 15,figy = 10,fontSize=40,DPI = 300
     #yscaled and xscaled are booleans which if set to True, scale the y and x axes by Mpl
     #xspan and yspan control the ylims and xlims, if left blank, set automatically
     #color takes either an array of colors, or the string 'random' which plots each line with a random color
+    #ylist and xlist may also be ScanDatasets from read(..., lazy = True), plotting column 1 against column 0 of each file
+    #decimate = True min/max decimates every series longer than max_points before plotting (default 4 points per pixel column, 4*figx*DPI)
+    #fig = an existing Figure to clear and redraw into; the new figure is closed after saving unless close = False or returnFig = True (then returned)
+    #usetex = 'auto' only runs LaTeX when a label needs it (see _needs_latex), mathtext renders everything else
+    #timings = Timings() records the scale, draw, legend and save stages
+    from matplotlib import cm
+    from matplotlib.patches import Polygon, PathPatch
+    from matplotlib.path import Path
+    _lap(timings)
+    if isinstance(xlist, ScanDataset):
+        xlist = xlist.series(0)
+    if isinstance(ylist, ScanDataset):
+        ylist = ylist.series(1)
     yl = ''
     xl = ''
-    _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=usetex, xtop=True, ytop=True)
-    if xscaled == 1:
-        xscaled = [1] * (len(xlist) + 1)
-    if yscaled == 1:
-        yscaled = [1] * (len(ylist) + 1)
-    if linestyle is None:
-        linestyle = ["solid"] * len(ylist)
-    if color == 'random':
-        if cmap is None:
-            color = [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist))]
-        else:
-            colmap = cm.get_cmap(cmap)
-            color = [colmap(i / max(len(ylist) - 1, 1)) for i in range(len(ylist))]
-
-    for l, arr in enumerate(xlist):
-        xlist[l] = [i / xscaled[l] for i in arr]
-    if xscaled != 1:
-        xl = ''
-    for l, arr in enumerate(ylist):
-        ylist[l] = [i / yscaled[l] for i in arr]
-    if yscaled != 1:
-        yl = ''
-    fig = plt.figure(figsize=[figx,figy])
-    axs = fig.subplots()
-    if top != False:
-        ax2 = axs.twiny()   
-    if len(ylabels) == 1:
-        axs.plot(xlist[0], ylist[0], color=color[0], label=(ylabels[0] + ' vs ' + xlabel), linestyle=linestyle[0], linewidth=lineWidth)
-        if Mline:
-            if 'aT' in globals() and 'M1' in globals():
-                axs.plot([aT(M1) for _ in range(10)], [ylist[0][int(np.size(ylist[0]) / 10) * i] for i in range(10)], linestyle="dashed", linewidth=lineWidth)
+    usetex = _resolve_usetex(usetex, [xlabel, *ylabels, *[t[2] for t in text or []]])
+    with _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=usetex, xtop=True, ytop=True):
+        if xscaled == 1:
+            xscaled = [1] * (len(xlist) + 1)
+        if yscaled == 1:
+            yscaled = [1] * (len(ylist) + 1)
+        if linestyle is None:
+            linestyle = ["solid"] * len(ylist)
+        if color == 'random':
+            if cmap is None:
+                color = [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist))]
             else:
-                print('Mline requested but aT or M1 not defined; skipping Mline')
-        if top is not False:
-            ax2.plot(xlist[0], ylist[0], color='None', linestyle=linestyle[0], linewidth=lineWidth)
-    else:
-        for l, yy in enumerate(ylist):
-            if l > len(ylabels) - 2:
-                axs.plot(xlist[l], yy, color=color[l], linestyle=linestyle[l], linewidth=lineWidth)
-            else:
-                axs.plot(xlist[l], yy, color=color[l], label=(ylabels[l + 1]), linestyle=linestyle[l], linewidth=lineWidth)
+                colmap = cm.get_cmap(cmap)
+                color = [colmap(i / max(len(ylist) - 1, 1)) for i in range(len(ylist))]
+
+        #scale as whole arrays into new lists, unscaled data is handed to matplotlib as is and the caller's lists are left alone
+        xlist = [arr if xscaled[l] == 1 else np.asarray(arr) / xscaled[l] for l, arr in enumerate(xlist)]
+        if xscaled != 1:
+            xl = ''
+        ylist = [arr if yscaled[l] == 1 else np.asarray(arr) / yscaled[l] for l, arr in enumerate(ylist)]
+        if yscaled != 1:
+            yl = ''
+        if decimate or max_points:
+            decimated = [_decimate(xx, yy, max_points=max_points, figx=figx, DPI=DPI, xscale=xscale) for xx, yy in zip(xlist, ylist)]
+            xlist = [d[0] for d in decimated] + xlist[len(decimated):]
+            ylist = [d[1] for d in decimated] + ylist[len(decimated):]
+        _lap(timings, 'scale', sum(np.size(yy) for yy in ylist))
+        reused = fig is not None
+        fig = _new_figure(fig, figx, figy)
+        axs = fig.subplots()
+        if top != False:
+            ax2 = axs.twiny()   
+        if len(ylabels) == 1:
+            axs.plot(xlist[0], ylist[0], color=color[0], label=(ylabels[0] + ' vs ' + xlabel), linestyle=linestyle[0], linewidth=lineWidth)
+            if Mline:
+                if 'aT' in globals() and 'M1' in globals():
+                    axs.plot([aT(M1) for _ in range(10)], [ylist[0][int(np.size(ylist[0]) / 10) * i] for i in range(10)], linestyle="dashed", linewidth=lineWidth)
+                else:
+                    print('Mline requested but aT or M1 not defined; skipping Mline')
             if top is not False:
-                ax2.plot(xlist[l], yy, color='None', linewidth=lineWidth)
-        if Mline:
-            if 'aT' in globals() and 'M1' in globals():
-                axs.plot([aT(M1) for _ in range(10)], [ylist[0][int(np.size(ylist[0]) / 10) * i] for i in range(10)], linestyle="dashed")
-            else:
-                print('Mline requested but aT or M1 not defined; skipping Mline')
-    axs.set_xlabel(xlabel+xl,fontsize =  fontSize,labelpad = 25)
-    axs.set_ylabel(ylabels[0],fontsize =  fontSize,labelpad = 25)
-    if xspan:
-        axs.set_xlim(xspan[0], xspan[1])
-    if yspan:
-        axs.set_ylim(yspan[0], yspan[1])
-    if yflip:
-        axs.invert_yaxis()
-    axs.set_xscale(xscale)
-    axs.set_yscale(yscale)
+                ax2.plot(xlist[0], ylist[0], color='None', linestyle=linestyle[0], linewidth=lineWidth)
+        else:
+            for l, yy in enumerate(ylist):
+                if l > len(ylabels) - 2:
+                    axs.plot(xlist[l], yy, color=color[l], linestyle=linestyle[l], linewidth=lineWidth)
+                else:
+                    axs.plot(xlist[l], yy, color=color[l], label=(ylabels[l + 1]), linestyle=linestyle[l], linewidth=lineWidth)
+                if top is not False:
+                    ax2.plot(xlist[l], yy, color='None', linewidth=lineWidth)
+            if Mline:
+                if 'aT' in globals() and 'M1' in globals():
+                    axs.plot([aT(M1) for _ in range(10)], [ylist[0][int(np.size(ylist[0]) / 10) * i] for i in range(10)], linestyle="dashed")
+                else:
+                    print('Mline requested but aT or M1 not defined; skipping Mline')
+        axs.set_xlabel(xlabel+xl,fontsize =  fontSize,labelpad = 25)
+        axs.set_ylabel(ylabels[0],fontsize =  fontSize,labelpad = 25)
+        if xspan:
+            axs.set_xlim(xspan[0], xspan[1])
+        if yspan:
+            axs.set_ylim(yspan[0], yspan[1])
+        if yflip:
+            axs.invert_yaxis()
+        axs.set_xscale(xscale)
+        axs.set_yscale(yscale)
     
-    axs.minorticks_on()
-
-    if np.size(ylabels) != 1:
-        ylabels = [ylabels[i] for i in range(1, np.size(ylabels))]
-    if leg:
-        plt.legend(ylabels, loc=leg[0], fontsize=leg[1])
-    if vertical != None:
-        for v in vertical:
-            plt.axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
-    if text != None:
-        for t in text:
-            plt.text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
-    if xTicks:
-        plt.xticks(xTicks)
-    if yTicks:
-        plt.yticks(yTicks)
-    for tick in axs.get_xticklabels(minor = False):
-        tick.set_y(-0.01)  # Adjust y-position of the tick labels
+        axs.minorticks_on()
+
+        if np.size(ylabels) != 1:
+            ylabels = [ylabels[i] for i in range(1, np.size(ylabels))]
+        _lap(timings, 'draw', len(ylist))
+        if leg:
+            fig.gca().legend(ylabels, loc=leg[0], fontsize=leg[1])
+        _lap(timings, 'legend', len(ylabels))
+        if vertical != None:
+            for v in vertical:
+                fig.gca().axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
+        if text != None:
+            for t in text:
+                fig.gca().text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
+        if xTicks:
+            fig.gca().set_xticks(xTicks)
+        if yTicks:
+            fig.gca().set_yticks(yTicks)
+        for tick in axs.get_xticklabels(minor = False):
+            tick.set_y(-0.01)  # Adjust y-position of the tick labels
 
         
         
-    for f in fill:
-        if f[2] == None:
-            # Create a polygon from the contour line
-            polygon = Polygon(np.column_stack((f[0], f[1])), closed=True, edgecolor='none')
+        for f in fill:
+            if f[2] == None:
+                # Create a polygon from the contour line
+                polygon = Polygon(np.column_stack((f[0], f[1])), closed=True, edgecolor='none')
             
-            # Use Path to create a mask outside the contour polygon
-            fpath = Path(polygon.get_xy())
-            outer_path = Path([
-                [axs.get_xlim()[0], axs.get_ylim()[0]],
-                [axs.get_xlim()[0], axs.get_ylim()[1]],
-                [axs.get_xlim()[1], axs.get_ylim()[1]],
-                [axs.get_xlim()[1], axs.get_ylim()[0]],
-                [axs.get_xlim()[0], axs.get_ylim()[0]],
-                    ])
+                # Use Path to create a mask outside the contour polygon
+                fpath = Path(polygon.get_xy())
+                outer_path = Path([
+                    [axs.get_xlim()[0], axs.get_ylim()[0]],
+                    [axs.get_xlim()[0], axs.get_ylim()[1]],
+                    [axs.get_xlim()[1], axs.get_ylim()[1]],
+                    [axs.get_xlim()[1], axs.get_ylim()[0]],
+                    [axs.get_xlim()[0], axs.get_ylim()[0]],
+                        ])
             
-            # Define a combined path that subtracts the contour path from the outer rectangle path
-            combined_path = Path.make_compound_path(outer_path, fpath)
+                # Define a combined path that subtracts the contour path from the outer rectangle path
+                combined_path = Path.make_compound_path(outer_path, fpath)
             
-            # Add a patch for shading outside the contour region
-            outside_patch = PathPatch(combined_path, facecolor=f[3], edgecolor='none', alpha=f[4])
-            axs.add_patch(outside_patch)
-        else:
-            plt.fill_between(f[0], f[1], f[2], color=f[3], alpha=f[4])
-    
+                # Add a patch for shading outside the contour region
+                outside_patch = PathPatch(combined_path, facecolor=f[3], edgecolor='none', alpha=f[4])
+                axs.add_patch(outside_patch)
+            else:
+                fig.gca().fill_between(f[0], f[1], f[2], color=f[3], alpha=f[4])
+        _lap(timings, 'draw', len(fill))
 
-    plt.savefig( path + name +  '.pdf',dpi=DPI, bbox_inches = "tight")
+        fig.savefig( path + name +  '.pdf',dpi=DPI, bbox_inches = "tight")
+        _lap(timings, 'save', 1)
+        return _finish_figure(fig, reused, close, returnFig)
     
-def difSubPlot(ylist,xlist,xlabel,ylabels,figx = 15,figy = 10,fontSize=40,tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],xminor=0,yminor=0,text=None,numTicksy=50,numTicksx = 50):
+def difSubPlot(ylist,xlist,xlabel,ylabels,figx = 15,figy = 10,fontSize=40,tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],xminor=0,yminor=0,text=None,numTicksy=50,numTicksx = 50,decimate = False,max_points = None,fig = None,close = True,returnFig = False,timings = None):
     '''plots a subplot with same arguments as difplot except no option to scale, Mline, flip or cmap'''
-    _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=False, xtop=True, ytop=True)
-    if linestyle is None:
-        linestyle = [["solid"] * len(ylist[0]), ["solid"] * len(ylist[1])]
-    if color == 'random':
-        color = [
-            [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist[0]))],
-            [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist[1]))],
-        ]
-    fig, axs = plt.subplots(2,figsize=[figx,figy])
-    if top != False:
-        ax2 = axs.twiny()  
-    for i in range(0,len(ylabels)):
-        if len(ylabels[i])==1:
-            axs[i].plot(xlist[i][0],ylist[i][0],color=color[i][0],label=(ylabels[i][0]+' vs ' + xlabel),linestyle=linestyle[i][0],linewidth = lineWidth)
-            if top != False:
-                ax2.plot(xlist[i][0],ylist[i][0],color='None',linestyle=linestyle[i][0],linewidth = lineWidth)
-        else:
-            for l in range(0 ,len(ylist[i])):
-                if l > len(ylabels[i])-2:
-                    axs[i].plot(xlist[i][l],ylist[i][l],color=color[i][l],linestyle=linestyle[i][l],linewidth = lineWidth)
-                else:
-                    axs[i].plot(xlist[i][l],ylist[i][l],color=color[i][l],label=ylabels[i][l+1],linestyle=linestyle[i][l],linewidth = lineWidth)
+    #decimate and max_points as in difplot, the pixel budget uses the figure dpi the JPEG is saved at
+    #fig, close, returnFig and timings as in difplot
+    import matplotlib as mpl
+    _lap(timings)
+    with _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=False, xtop=True, ytop=True):
+        if linestyle is None:
+            linestyle = [["solid"] * len(ylist[0]), ["solid"] * len(ylist[1])]
+        if color == 'random':
+            color = [
+                [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist[0]))],
+                [f"#{random.randint(0, 0xFFFFFF):06X}" for _ in range(len(ylist[1]))],
+            ]
+        if decimate or max_points:
+            xlist, ylist = list(xlist), list(ylist)
+            for i in range(2):
+                decimated = [_decimate(xx, yy, max_points=max_points, figx=figx, DPI=mpl.rcParams['figure.dpi'], xscale=xscale) for xx, yy in zip(xlist[i], ylist[i])]
+                xlist[i] = [d[0] for d in decimated]
+                ylist[i] = [d[1] for d in decimated]
+        _lap(timings, 'scale', sum(np.size(yy) for ys in ylist for yy in ys))
+        reused = fig is not None
+        fig = _new_figure(fig, figx, figy)
+        axs = fig.subplots(2)
+        if top != False:
+            ax2 = axs.twiny()  
+        for i in range(0,len(ylabels)):
+            if len(ylabels[i])==1:
+                axs[i].plot(xlist[i][0],ylist[i][0],color=color[i][0],label=(ylabels[i][0]+' vs ' + xlabel),linestyle=linestyle[i][0],linewidth = lineWidth)
                 if top != False:
-                    ax2.plot(xlist[i][l],ylist[i][l],color='None',linewidth = lineWidth)
-    axs[0].set_xlabel(xlabel[0],fontsize =  fontSize)
-    axs[0].set_ylabel(ylabels[0],fontsize=fontSize)
-    axs[1].set_xlabel(xlabel[1],fontsize =  fontSize)
-    axs[1].set_ylabel(ylabels[1],fontsize=fontSize)
-    if xspan !=[]:
-        axs[0].set_xlim(xspan[0][0],xspan[0][1])
-        axs[1].set_xlim(xspan[1][0],xspan[1][1])
-    if yspan !=[]:
-        axs[0].set_ylim(yspan[0][0],yspan[0][1])  
-        axs[1].set_ylim(yspan[1][0],yspan[1][1])  
-    axs[0].set_xscale(xscale)
-    axs[0].set_yscale(yscale)
-    axs[1].set_xscale(xscale)
-    axs[1].set_yscale(yscale)
-    if top != False:
-        ax2.set_xscale(xscale)
-        ax2.set_xticklabels([str(round(float(top[0](ax2.get_xticks()[i])/M1),2)) for i in range(0,np.size(ax2.get_xticks()))])
-        ax2.set_xlabel(top[1])
-        #ax2.xaxis.set_major_formatter(FormatStrFormatter('{x:,.2f}'))
-    #plt.tight_layout()
-    if np.size(ylabels) != 1:
-        ylabels[0] = [ylabels[0][i] for i in range(1,np.size(ylabels[0]))]
-        ylabels[1] = [ylabels[1][i] for i in range(1,np.size(ylabels[1]))]
-    if leg != False:
-        axs[0].legend(ylabels[0],loc=leg[0][0],fontsize=leg[0][1])
-        axs[1].legend(ylabels[1],loc=leg[1][0],fontsize=leg[1][1])
-    if vertical != None:
-        for v in vertical[0]:
-            axs[0].axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
-        for v in vertical[1]:
-            axs[1].axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
-    if text != None:
-        for t in text[0]:
-            axs[0].text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
-        for t in text[1]:
-            axs[0].text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
-    plt.savefig(path + name + '.jpeg')
+                    ax2.plot(xlist[i][0],ylist[i][0],color='None',linestyle=linestyle[i][0],linewidth = lineWidth)
+            else:
+                for l in range(0 ,len(ylist[i])):
+                    if l > len(ylabels[i])-2:
+                        axs[i].plot(xlist[i][l],ylist[i][l],color=color[i][l],linestyle=linestyle[i][l],linewidth = lineWidth)
+                    else:
+                        axs[i].plot(xlist[i][l],ylist[i][l],color=color[i][l],label=ylabels[i][l+1],linestyle=linestyle[i][l],linewidth = lineWidth)
+                    if top != False:
+                        ax2.plot(xlist[i][l],ylist[i][l],color='None',linewidth = lineWidth)
+        axs[0].set_xlabel(xlabel[0],fontsize =  fontSize)
+        axs[0].set_ylabel(ylabels[0],fontsize=fontSize)
+        axs[1].set_xlabel(xlabel[1],fontsize =  fontSize)
+        axs[1].set_ylabel(ylabels[1],fontsize=fontSize)
+        if xspan !=[]:
+            axs[0].set_xlim(xspan[0][0],xspan[0][1])
+            axs[1].set_xlim(xspan[1][0],xspan[1][1])
+        if yspan !=[]:
+            axs[0].set_ylim(yspan[0][0],yspan[0][1])  
+            axs[1].set_ylim(yspan[1][0],yspan[1][1])  
+        axs[0].set_xscale(xscale)
+        axs[0].set_yscale(yscale)
+        axs[1].set_xscale(xscale)
+        axs[1].set_yscale(yscale)
+        if top != False:
+            ax2.set_xscale(xscale)
+            ax2.set_xticklabels([str(round(float(top[0](ax2.get_xticks()[i])/M1),2)) for i in range(0,np.size(ax2.get_xticks()))])
+            ax2.set_xlabel(top[1])
+            #ax2.xaxis.set_major_formatter(FormatStrFormatter('{x:,.2f}'))
+        #plt.tight_layout()
+        if np.size(ylabels) != 1:
+            ylabels[0] = [ylabels[0][i] for i in range(1,np.size(ylabels[0]))]
+            ylabels[1] = [ylabels[1][i] for i in range(1,np.size(ylabels[1]))]
+        _lap(timings, 'draw', len(ylist[0]) + len(ylist[1]))
+        if leg != False:
+            axs[0].legend(ylabels[0],loc=leg[0][0],fontsize=leg[0][1])
+            axs[1].legend(ylabels[1],loc=leg[1][0],fontsize=leg[1][1])
+        _lap(timings, 'legend', 2)
+        if vertical != None:
+            for v in vertical[0]:
+                axs[0].axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
+            for v in vertical[1]:
+                axs[1].axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
+        if text != None:
+            for t in text[0]:
+                axs[0].text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
+            for t in text[1]:
+                axs[0].text(t[0],t[1],t[2],rotation=t[4],color = t[3],size=t[5])
+        _lap(timings, 'draw')
+        fig.savefig(path + name + '.jpeg')
+        _lap(timings, 'save', 1)
+        return _finish_figure(fig, reused, close, returnFig)
     
 
     
-def contplot(xlist,ylist,zlist,xlabel,ylabel,zlabel,figx = 15,figy = 10,vmax=0,vmin= 0,fontSize=20,contours = None,zlist2 = [],alt = ['None'],tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap='PuBu_r',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],returnPoints = False,text=None,logColors=True,lines=[],inLine = False,legend_boolean = None,algorithm = 'mpl2014',labelSize = 15):
+def contplot(xlist,ylist,zlist,xlabel,ylabel,zlabel,figx = 15,figy = 10,vmax=0,vmin= 0,fontSize=20,contours = None,zlist2 = [],alt = ['None'],tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap='PuBu_r',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],returnPoints = False,text=None,logColors=True,lines=[],inLine = False,legend_boolean = None,algorithm = 'mpl2014',labelSize = 15,fig = None,close = True,returnFig = False,contourCache = False,timings = None):
     '''plots a subplot with same arguments as difplot except no option to scale, Mline, flip or cmap'''
-    plt.rcParams.update({'font.size': fontSize,'font.family':font})
-    plt.rcParams['axes.linewidth'] = borderWidth
-
-    #x ticks dimension
-    plt.rcParams['xtick.major.size'] = 12*tickSize
-    plt.rcParams['xtick.major.width'] = 2*tickSize
-    plt.rcParams['xtick.minor.size'] = 8*tickSize
-    plt.rcParams['xtick.minor.width'] = 2*tickSize
-    
-    
-    
-    #y ticks dimension
-    plt.rcParams['ytick.major.size'] = 12*tickSize
-    plt.rcParams['ytick.major.width'] = 2*tickSize
-    plt.rcParams['ytick.minor.size'] = 8*tickSize
-    plt.rcParams['ytick.minor.width'] = 2*tickSize
-    
-    
-    
-    #tick direction
-    plt.rcParams['xtick.direction'] = tickDirection
-    plt.rcParams['ytick.direction'] = tickDirection
-    
-    plt.rcParams['xtick.labelsize'] = labelSize  # Adjust as needed
-    plt.rcParams['ytick.labelsize'] = labelSize  # Adjust as needed
-    
-    
-    
-    #other options
-    plt.rcParams['xtick.top'] = False
-    plt.rcParams['ytick.right'] = False
-    plt.rcParams['axes.unicode_minus'] = False
-
-    plt.rcParams['text.usetex'] = False
-    plt.rcParams['font.family'] = 'Times New Roman'
-    plt.rcParams['mathtext.fontset'] = 'cm'  # Computer Modern
-    plt.rcParams['mathtext.rm'] = 'Times New Roman'
-    plt.rcParams['mathtext.it'] = 'Times New Roman:italic'
+    #fig, close and returnFig as in difplot, with returnPoints and returnFig both set [contour_points, fig] is returned
+    #contourCache = True (or a folder) memoizes the contour lines per grid and level, so restyling the same grids skips contouring
+    #timings = Timings() records the draw, contour, legend and save stages
+    from matplotlib import colors
+    _lap(timings)
+    with _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=False, xtop=False, ytop=False, labelSize=labelSize, extra=_CONTPLOT_RC):
+        reused = fig is not None
+        fig = _new_figure(fig, figx, figy)
+        ax = fig.subplots(1, 1)
 
-    
-
-    
-    plt.rcParams['font.weight'] = 'normal'
-    plt.rcParams['axes.labelweight'] = 'normal'  # Axis label font weight
-    plt.rcParams['mathtext.default'] = 'regular'  # Ensure math text is not bold
-
-
-    
-    if legend_boolean == None:
-        legend_boolean = [True for i in contours[0][1]]
-    
-    legend_labels,legend_lines = [],[]
-    fig, ax = plt.subplots(1, 1,figsize=[figx,figy])
-    
-    contour_points = []
-
-    if logColors:
-        if vmax != 0 and vmin != 0:
-            Norm = colors.LogNorm(vmax=vmax, vmin=vmin)
-        else:
-            Norm = colors.LogNorm()
-    else:
-        if vmax != 0 and vmin != 0:
-            Norm = colors.Normalize(vmax=vmax, vmin=vmin)
+        if logColors:
+            if vmax != 0 and vmin != 0:
+                Norm = colors.LogNorm(vmax=vmax, vmin=vmin)
+            else:
+                Norm = colors.LogNorm()
         else:
-            Norm = colors.Normalize()
-    for C in contours:
-        cont = ax.contour(xlist,ylist,zlist,levels=[C[0]],linestyles = C[2],colors = C[1],linewidths = lineWidth,algorithm = algorithm)
-        if inLine == True:
-            ax.clabel(cont, inline=True, fontsize=leg[1],fmt = zlabel)
-        elif legend_boolean[0] == True:
-            legend_lines.append(Line2D([0], [0], color=C[1][0], linestyle=C[2], linewidth=lineWidth))
-            legend_labels.append(zlabel)
-            
-        if returnPoints == True:
-            for collection in cont.collections:
-                for path in collection.get_paths():
-                    contour_points.append(path.vertices)  # path.vertices is a 2D array of points (x, y)
-
-    
-        for j in range(0,len(zlist2)):
-            cont2 = ax.contour(xlist,ylist,zlist2[j],levels=[C[0]],linestyles = C[j+3],colors = C[1][j+1],algorithm = algorithm)    
-            if inLine == True:
-                ax.clabel(cont2, inline=inLine, fontsize=leg[1],fmt = leg[2][j])
-            elif legend_boolean[j + 1] == True:
-                legend_lines.append(Line2D([0], [0], color=C[1][j + 1], linestyle=C[j+ 3], linewidth=lineWidth))
-                legend_labels.append(leg[2][j])
-            if returnPoints == True:
-                for collection in cont2.collections:
-                    for path in collection.get_paths():
-                        contour_points.append(path.vertices)  # path.vertices is a 2D array of points (x, y)
-        
-    ax.legend(legend_lines, legend_labels,loc = leg[0],fontsize = leg[1])
+            if vmax != 0 and vmin != 0:
+                Norm = colors.Normalize(vmax=vmax, vmin=vmin)
+            else:
+                Norm = colors.Normalize()
+        _lap(timings, 'draw')
+        legend_lines, legend_labels, contour_points = _draw_contours(ax, xlist, ylist, zlist, zlist2, contours, zlabel, leg, lineWidth=lineWidth, inLine=inLine, legend_boolean=legend_boolean, returnPoints=returnPoints, algorithm=algorithm, cache=contourCache)
+        _lap(timings, 'contour', len(contours) * (1 + len(zlist2)))
+        ax.legend(legend_lines, legend_labels,loc = leg[0],fontsize = leg[1])
+        _lap(timings, 'legend', len(legend_lines))
         
-    ax.set_yscale(yscale)
-    ax.set_xscale(xscale)
-    ax.set_xlabel(xlabel,fontsize =  fontSize)
-    ax.set_ylabel(ylabel,fontsize =  fontSize)
+        ax.set_yscale(yscale)
+        ax.set_xscale(xscale)
+        ax.set_xlabel(xlabel,fontsize =  fontSize)
+        ax.set_ylabel(ylabel,fontsize =  fontSize)
 
     
-    ax.minorticks_on()
+        ax.minorticks_on()
 
 
 
-    if xspan !=[]:
-        ax.set_xlim(xspan[0],xspan[1])
-    if yspan !=[]:
-        ax.set_ylim(yspan[0],yspan[1])   
+        if xspan !=[]:
+            ax.set_xlim(xspan[0],xspan[1])
+        if yspan !=[]:
+            ax.set_ylim(yspan[0],yspan[1])   
 
 
-    if text != None:
-        for t in text:
-            ax.text(t[0],t[1],t[2],rotation=t[4],color = t[3],size = t[5])
-    for l in lines:
-        ax.plot(l[0],l[1],color=l[2],linestyle=l[3])
-    if alt != ['None']:
-        for a in alt:
-            ax.contour(a[0],a[1],a[2],levels=[a[3]],colors = a[4],linestyles = a[5],linewidths = a[6])
-    if vertical != None:
-        for v in vertical:
-            plt.axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
+        if text != None:
+            for t in text:
+                ax.text(t[0],t[1],t[2],rotation=t[4],color = t[3],size = t[5])
+        for l in lines:
+            ax.plot(l[0],l[1],color=l[2],linestyle=l[3])
+        if alt != ['None']:
+            for a in alt:
+                ax.contour(a[0],a[1],a[2],levels=[a[3]],colors = a[4],linestyles = a[5],linewidths = a[6])
+        if vertical != None:
+            for v in vertical:
+                ax.axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
     
     
-    if returnPoints == True:
-        return contour_points
-    else:
-        plt.savefig(path + name + '.pdf')
+        _lap(timings, 'draw')
+        if returnPoints == True:
+            _finish_figure(fig, reused, close, returnFig)
+            return [contour_points, fig] if returnFig else contour_points
+        else:
+            fig.savefig(path + name + '.pdf')
+            _lap(timings, 'save', 1)
+            return _finish_figure(fig, reused, close, returnFig)
     
         
     
     
-def colplot(xlist,ylist,zlist,xlabel,ylabel,zlabel,figx = 15,figy = 10,vmax=0,vmin= 0,fontSize=20,contours = None,zlist2 = [],alt = ['None'],tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap='PuBu_r',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],text=None,logColors=True,lines=[],inLine = False,legend_boolean = None,returnPoints = False):
+def colplot(xlist,ylist,zlist,xlabel,ylabel,zlabel,figx = 15,figy = 10,vmax=0,vmin= 0,fontSize=20,contours = None,zlist2 = [],alt = ['None'],tickDirection='in',tickSize=1,font='serif',lineWidth=1.5,borderWidth = 3,color='random',cmap='PuBu_r',xscale='linear',yscale='linear',name='dif.png',xspan=[],yspan=[],linestyle=None,path='Figures/',top = False,Loc='best',vertical = None,leg=['best','10'],text=None,logColors=True,lines=[],inLine = False,legend_boolean = None,returnPoints = False,fig = None,close = True,returnFig = False,usetex = True,texCache = None,heatmap = 'auto',rasterized = False,contourCache = False,timings = None):
     '''plots a subplot with same arguments as difplot except no option to scale, Mline, flip or cmap'''
-    plt.rcParams.update({'font.size': fontSize,'font.family':font})
-    plt.rcParams['axes.linewidth'] = borderWidth
-    plt.rcParams.update({
-    "text.usetex": True,             # Enable LaTeX rendering
-    "font.family": "serif",          # Use a serif font by default
-    "text.latex.preamble": r"\usepackage{amsmath}",  # Optional, for advanced math formatting
-})
-
-    #x ticks dimension
-    plt.rcParams['xtick.major.size'] = 12*tickSize
-    plt.rcParams['xtick.major.width'] = 2*tickSize
-    plt.rcParams['xtick.minor.size'] = 8*tickSize
-    plt.rcParams['xtick.minor.width'] = 2*tickSize
-    
-    
-    
-    #y ticks dimension
-    plt.rcParams['ytick.major.size'] = 12*tickSize
-    plt.rcParams['ytick.major.width'] = 2*tickSize
-    plt.rcParams['ytick.minor.size'] = 8*tickSize
-    plt.rcParams['ytick.minor.width'] = 2*tickSize
-    
-    
-    
-    #tick direction
-    plt.rcParams['xtick.direction'] = tickDirection
-    plt.rcParams['ytick.direction'] = tickDirection
-    
-    plt.rcParams['xtick.labelsize'] = fontSize
-    plt.rcParams['ytick.labelsize'] = fontSize
-    
-    
-    
-    #other options
-    plt.rcParams['xtick.top'] = True
-    plt.rcParams['ytick.right'] = True
-    plt.rcParams['axes.unicode_minus'] = False
-    contour_points = []
-    
-    if legend_boolean is None:
-        legend_boolean = [True] * len(contours[0][1])
-
-    legend_labels, legend_lines = [], []
-    fig, ax = plt.subplots(1, 1, figsize=[figx, figy])
-    if logColors:
-        if vmax != 0 and vmin != 0:
-            Norm = colors.LogNorm(vmax=vmax, vmin=vmin)
-        else:
-            Norm = colors.LogNorm()
-    else:
-        if vmax != 0 and vmin != 0:
-            Norm = colors.Normalize(vmax=vmax, vmin=vmin)
+    #fig, close and returnFig as in difplot, with returnPoints and returnFig both set [contour_points, fig] is returned
+    #labels are rendered with LaTeX (amsmath loaded) unless usetex = False, usetex = 'auto' falls back to mathtext
+    #when no label needs LaTeX; texCache points the persistent LaTeX cache at a (shared) folder for this plot only,
+    #set_tex_cache changes it for the whole process
+    #heatmap picks how zlist is drawn: 'auto' uses imshow for evenly spaced grids on linear axes, pcolormesh for other
+    #rectilinear grids and pcolor otherwise, or force 'pcolor', 'pcolormesh' or 'imshow'; rasterized = True rasterizes
+    #the heatmap layer only, contours and text stay vector; contourCache and timings as in contplot
+    from matplotlib import colors
+    from matplotlib.ticker import LogLocator
+    _lap(timings)
+    usetex = _resolve_usetex(usetex, [xlabel, ylabel, zlabel, *(leg[2] if len(leg) > 2 else []), *[t[2] for t in text or []]])
+    with _configure_rcparams(fontSize=fontSize, font=font, borderWidth=borderWidth, tickSize=tickSize, tickDirection=tickDirection, usetex=usetex, xtop=True, ytop=True, extra=_COLPLOT_RC), _scoped_tex_cache(texCache):
+        reused = fig is not None
+        fig = _new_figure(fig, figx, figy)
+        ax = fig.subplots(1, 1)
+        if logColors:
+            if vmax != 0 and vmin != 0:
+                Norm = colors.LogNorm(vmax=vmax, vmin=vmin)
+            else:
+                Norm = colors.LogNorm()
         else:
-            Norm = colors.Normalize()
+            if vmax != 0 and vmin != 0:
+                Norm = colors.Normalize(vmax=vmax, vmin=vmin)
+            else:
+                Norm = colors.Normalize()
 
-    pcm = ax.pcolor(xlist, ylist, zlist, cmap=cmap, shading='auto', norm=Norm)
-    
-    for C in contours:
-        cont = ax.contour(xlist,ylist,zlist,levels=[C[0]],linestyles = C[2],colors = C[1][0],linewidths = lineWidth)
-        if inLine == True:
-            ax.clabel(cont, inline=True, fontsize=leg[1],fmt = zlabel)
-        elif legend_boolean[0] == True:
-            legend_lines.append(Line2D([0], [0], color=C[1][0], linestyle=C[2], linewidth=lineWidth))
-            legend_labels.append(zlabel)
-        if returnPoints == True:
-            for collection in cont.collections:
-                for path in collection.get_paths():
-                    contour_points.append(path.vertices)
-    
-        for j in range(0,len(zlist2)):
-            cont2 = ax.contour(xlist,ylist,zlist2[j],levels=[C[0]],linestyles = C[j+3],colors = C[1][j+1])    
-            if inLine == True:
-                ax.clabel(cont2, inline=inLine, fontsize=leg[1],fmt = leg[2][j])
-            elif legend_boolean[j + 1] == True:
-                legend_lines.append(Line2D([0], [0], color=C[1][j + 1], linestyle=C[j+ 3], linewidth=lineWidth))
-                legend_labels.append(leg[2][j])
-            if returnPoints == True:
-                for collection in cont2.collections:
-                    for path in collection.get_paths():
-                        contour_points.append(path.vertices)
-        
-    ax.legend(legend_lines, legend_labels,loc = leg[0],fontsize = leg[1])
-    ax.minorticks_on()   
+        pcm = _heatmap(ax, xlist, ylist, zlist, cmap=cmap, norm=Norm, method=heatmap, rasterized=rasterized, xscale=xscale, yscale=yscale)
+        _lap(timings, 'draw', np.size(zlist))
+        legend_lines, legend_labels, contour_points = _draw_contours(ax, xlist, ylist, zlist, zlist2, contours, zlabel, leg, lineWidth=lineWidth, inLine=inLine, legend_boolean=legend_boolean, returnPoints=returnPoints, cache=contourCache)
+        _lap(timings, 'contour', len(contours) * (1 + len(zlist2)))
+        ax.legend(legend_lines, legend_labels,loc = leg[0],fontsize = leg[1])
+        _lap(timings, 'legend', len(legend_lines))
+        ax.minorticks_on()   
  
-    if xscale == 'log':
-        ax.set_xscale(xscale)
-        ax.xaxis.set_minor_locator(LogLocator())
+        if xscale == 'log':
+            ax.set_xscale(xscale)
+            ax.xaxis.set_minor_locator(LogLocator())
     
-    if yscale == 'log':
-        ax.set_yscale(yscale)
-        ax.xaxis.set_minor_locator(LogLocator())
+        if yscale == 'log':
+            ax.set_yscale(yscale)
+            ax.xaxis.set_minor_locator(LogLocator())
 
         
         
-    ax.set_xlabel(xlabel,fontsize =  fontSize)
-    ax.set_ylabel(ylabel,fontsize =  fontSize)
+        ax.set_xlabel(xlabel,fontsize =  fontSize)
+        ax.set_ylabel(ylabel,fontsize =  fontSize)
     
     
-    if xspan !=[]:
-        ax.set_xlim(xspan[0],xspan[1])
-    if yspan !=[]:
-        ax.set_ylim(yspan[0],yspan[1])   
-
-
-    if text != None:
-        for t in text:
-            ax.text(t[0],t[1],t[2],rotation=t[4],color = t[3],size = t[5])
-    for l in lines:
-        ax.plot(l[0],l[1],color=l[2],linestyle=l[3])
-    if alt != ['None']:
-        for a in alt:
-            ax.contour(a[0],a[1],a[2],levels=[a[3]],colors = a[4],linestyles = a[5],linewidths = a[6])
-    if vertical != None:
-        for v in vertical:
-            plt.axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
+        if xspan !=[]:
+            ax.set_xlim(xspan[0],xspan[1])
+        if yspan !=[]:
+            ax.set_ylim(yspan[0],yspan[1])   
+
+
+        if text != None:
+            for t in text:
+                ax.text(t[0],t[1],t[2],rotation=t[4],color = t[3],size = t[5])
+        for l in lines:
+            ax.plot(l[0],l[1],color=l[2],linestyle=l[3])
+        if alt != ['None']:
+            for a in alt:
+                ax.contour(a[0],a[1],a[2],levels=[a[3]],colors = a[4],linestyles = a[5],linewidths = a[6])
+        if vertical != None:
+            for v in vertical:
+                ax.axvline(x=v[0], ymin=v[1], ymax=v[2],color=v[3],linestyle = v[4])
     
-    for tick in ax.get_xticklabels(minor = False):
-        tick.set_y(-0.01)  # Adjust y-position of the tick labels
+        for tick in ax.get_xticklabels(minor = False):
+            tick.set_y(-0.01)  # Adjust y-position of the tick labels
 
-    if returnPoints == True:
-        return contour_points
-    else: 
-        plt.savefig(path + name + '.pdf')
+        _lap(timings, 'draw')
+        if returnPoints == True:
+            _finish_figure(fig, reused, close, returnFig)
+            return [contour_points, fig] if returnFig else contour_points
+        else: 
+            fig.savefig(path + name + '.pdf')
+            _lap(timings, 'save', 1)
+            return _finish_figure(fig, reused, close, returnFig)
     
-def read(path,master = [],output = 0,dtype = float,mi = 10000,length = 9,neg = 1, ref = [],size = None):
-    Ys = []
-    Mtemp,Mcheck = [],[]
-    filetemp,iterable = '',[]
-    sort = False 
-    if master != []:
-        for m in master:
-            ms = f'{m:.1e}'
-            ms = path + ms + '.txt'
-            iterable.append([float(m), ms])
+_BATCH_FUNCS = ('difplot', 'difSubPlot', 'contplot', 'colplot')
+
+
+def _batch_init(backend):
+    '''worker initializer for render_batch: switch to a non-interactive backend'''
+    import matplotlib as mpl
+    mpl.use(backend, force=True)
+
+
+def _render_spec(indexed):
+    '''renders one render_batch spec, returns its record'''
+    i, spec = indexed
+    if isinstance(spec, dict):
+        func, args, kwargs = spec['func'], spec.get('args', ()), spec.get('kwargs', {})
+    elif len(spec) == 2:
+        (func, kwargs), args = spec, ()
+    else:
+        func, args, kwargs = spec
+    import matplotlib.pyplot as plt
+    record = {'index': i, 'func': func, 'name': kwargs.get('name'), 'time': 0.0, 'error': None, 'traceback': None}
+    #only figures the spec opens are closed, a serial batch runs in the caller's process and must keep theirs
+    before = set(plt.get_fignums())
+    t0 = time.perf_counter()
+    try:
+        if func not in _BATCH_FUNCS:
+            raise ValueError(f'render_batch can only call {", ".join(_BATCH_FUNCS)}, got {func!r}')
+        globals()[func](*args, **kwargs)
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+        record['traceback'] = traceback.format_exc()
+    finally:
+        for num in set(plt.get_fignums()) - before:
+            plt.close(num)
+    record['time'] = time.perf_counter() - t0
+    return record
+
+
+def render_batch(specs, workers=None, backend='Agg'):
+    '''renders many figures, optionally across a process pool, returns one record per spec
+
+    Each spec is (func, kwargs), (func, args, kwargs) or a dict with 'func', 'args' and
+    'kwargs', where func names one of difplot, difSubPlot, contplot or colplot. Workers
+    are separate processes, each on the non-interactive backend, since pyplot cannot be
+    shared between threads. Records hold the spec index, func, output name, wall time in
+    seconds, and the error message and traceback (both None on success), and come back
+    in spec order. A failing figure does not stop the batch. Figures the caller already
+    has open are left alone.
+    '''
+    items = list(enumerate(specs))
+    if not workers or workers <= 1:
+        return [_render_spec(it) for it in items]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_batch_init, initargs=(backend,)) as ex:
+        return list(ex.map(_render_spec, items))
+
+
+def _pool_map(func, items, workers=None, pool='process'):
+    '''maps func over items, in order, optionally spread over a thread or process pool'''
+    items = list(items)
+    if not workers or workers <= 1 or len(items) <= 1:
+        return [func(it) for it in items]
+    if pool == 'thread':
+        Executor = ThreadPoolExecutor
+    elif pool == 'process':
+        Executor = ProcessPoolExecutor
     else:
-        for filename in glob.glob(path + "*"):
-            name = os.path.basename(filename)[:length]
-            iterable.append([float(name),filename])
-        sort = True
-    for it in iterable:
-        Ystemp = []
-        M, Mstring = it[0], f'{it[0]:.1e}'
-        if ref:
-            Mcheck.append(float(Mstring))
-        data = np.genfromtxt(it[1], dtype=dtype)
-        if output == 3:
-            print(f'Reading file {Mstring}')
-        if size is None:
-            size = len(data)
-        for j in range(0, size):
-            nan = False
-            if np.size(data[j]) != 1:
-                for k in range(0, np.size(data[j])):
-                    if np.isnan(data[j][k]):
-                        if output != 1:
-                            print(f'Nan detected in {Mstring}')
-                        nan = True
-                if j <= mi and not nan:
-                    datareal = [data[j][k].real for k in range(0, np.size(data[j]))]
-                    Ystemp.append(neg * datareal)
+        raise ValueError(f"pool must be 'thread' or 'process', got {pool!r}")
+    chunksize = max(1, len(items) // (4 * workers))
+    with Executor(max_workers=workers) as ex:
+        if pool == 'process':
+            return list(ex.map(func, items, chunksize=chunksize))
+        return list(ex.map(func, items))
+
+
+def _parse(filename, dtype=float, parser='genfromtxt', max_rows=None):
+    '''parses a plain numeric text file with the selected parser backend'''
+    #'genfromtxt' is the reference parser and the only one tolerating missing or malformed values
+    #'loadtxt' uses numpy's C reader, fine for any file with a fixed column count, complex values included
+    #max_rows stops reading after that many rows, the rest of the file is never touched
+    if parser == 'genfromtxt':
+        return np.genfromtxt(filename, dtype=dtype, max_rows=max_rows)
+    if parser == 'loadtxt':
+        return np.loadtxt(filename, dtype=dtype, max_rows=max_rows)
+    raise ValueError(f"parser must be 'genfromtxt' or 'loadtxt', got {parser!r}")
+
+
+def _load(filename, dtype=float, cache=None, parser='genfromtxt', mmap=False, max_rows=None):
+    '''parses a scan file, going through the optional binary cache'''
+    #cache = True keeps .npy copies in a hidden .difplot_cache folder next to the file, a string gives the cache folder
+    #entries are keyed by path and dtype and stamped with size and mtime, so only changed files are parsed again
+    #mmap = True returns cached entries memory-mapped read-only instead of loading them
+    if not cache:
+        return _parse(filename, dtype=dtype, parser=parser, max_rows=max_rows)
+    folder = os.path.join(os.path.dirname(filename), '.difplot_cache') if cache is True else cache
+    st = os.stat(filename)
+    key = hashlib.sha1(f'{os.path.abspath(filename)}|{np.dtype(dtype).str}|{max_rows}'.encode()).hexdigest()[:20]
+    entry = os.path.join(folder, f'{key}_{st.st_size}_{st.st_mtime_ns}.npy')
+    if os.path.exists(entry):
+        return np.load(entry, mmap_mode='r' if mmap else None)
+    data = _parse(filename, dtype=dtype, parser=parser, max_rows=max_rows)
+    os.makedirs(folder, exist_ok=True)
+    #loaders sharing the folder may have just written entry or removed the same stale file
+    for stale in glob.glob(os.path.join(folder, key + '_*.npy')):
+        if stale != entry:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    tmp = f'{entry}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, data)
+    os.replace(tmp, entry)
+    return np.load(entry, mmap_mode='r') if mmap else data
+
+
+def _max_rows(mi=None, size=None):
+    '''number of leading rows that can survive the mi and size caps, None if the whole file is needed'''
+    caps = [int(c) for c in (size, None if mi is None or not np.isfinite(mi) else math.floor(mi) + 1) if c is not None]
+    if not caps:
+        return None
+    #never ask for a single row, a one-row read would come back 1D and look like a single column file
+    return max(min(caps), 2)
+
+
+def read_chunks(filename, chunk=100000, dtype=float, mi=None, size=None, neg=1, output=0, parser='genfromtxt', length=9):
+    '''yields the rows of a single scan file in blocks of at most chunk rows, filtered exactly like read()
+
+    Only the rows allowed by the mi and size caps are read from disk, so peak memory
+    is bounded by chunk whatever the size of the file. Each block is an ndarray that
+    can go straight into sample() or a plot. length is that of read(), used to name the
+    file's parameter in diagnostics.
+    '''
+    name = os.path.basename(filename)
+    try:
+        Mstring = f'{float(name[:length]):.1e}'
+    except ValueError:
+        Mstring = name
+    stop = _max_rows(mi, size)
+    start, nanReported = 0, False
+    with open(filename) as f:
+        lines = (line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        if stop is not None:
+            lines = islice(lines, stop)
+        while True:
+            block = list(islice(lines, chunk))
+            if not block:
+                return
+            if parser == 'genfromtxt':
+                rows = np.genfromtxt(block, dtype=dtype)
             else:
-                if j <= mi and not nan and not np.isnan(data[j]):
-                    Ystemp.append(neg * data[j].real)
-                else:
-                    pass
-        Mtemp.append(M)
-        Ys.append(Ystemp)
+                rows = np.loadtxt(block, dtype=dtype)
+            #the column count comes from the parsed block, so inline comments do not count as columns
+            rows = rows.reshape(len(block), -1)
+            if rows.shape[1] == 1:
+                rows = rows.reshape(len(block))
+            index = np.arange(start, start + len(rows))
+            #_max_rows reads at least 2 rows, so the size cap is applied again as _read_file does
+            keep = (index <= (np.inf if mi is None else mi)) & (index < (np.inf if size is None else size))
+            if rows.ndim > 1:
+                nan = np.isnan(rows).any(axis=1)
+                if output != 1 and nan.any() and not nanReported:
+                    print(f'Nan detected in {Mstring}')
+                    nanReported = True
+            else:
+                nan = np.isnan(rows)
+            keep &= ~nan
+            start += len(rows)
+            Ystemp = rows.real if keep.all() else rows[keep].real
+            yield np.ascontiguousarray(Ystemp if neg == 1 else neg * Ystemp)
+
+
+def _read_file(it, dtype=float, mi=10000, size=None, neg=1, output=0, cache=None, parser='genfromtxt', mmap=False):
+    '''reads and filters a single scan file for read(), returns [M, Ystemp, size, messages, [parse seconds, filter seconds]]'''
+    #rows holding a NaN are dropped, only rows with index <= mi are kept and the real part is taken,
+    #all as whole-array operations so Ystemp is a contiguous ndarray rather than a list of rows
+    messages = []
+    M, Mstring = it[0], f'{it[0]:.1e}'
+    t0 = time.perf_counter()
+    data = np.atleast_1d(_load(it[1], dtype=dtype, cache=cache, parser=parser, mmap=mmap, max_rows=_max_rows(mi, size)))
+    t1 = time.perf_counter()
+    if output == 3:
+        messages.append(f'Reading file {Mstring}')
+    if size is None:
+        size = len(data)
+    rows = data[:size]
+    keep = np.arange(len(rows)) <= mi
+    if rows.ndim > 1:
+        nan = np.isnan(rows).any(axis=1)
+        if output != 1 and nan.any():
+            messages.append(f'Nan detected in {Mstring}')
+    else:
+        nan = np.isnan(rows)
+    keep &= ~nan
+    #untouched files stay views, so a memory-mapped file is not copied
+    Ystemp = rows.real if keep.all() else rows[keep].real
+    Ystemp = np.ascontiguousarray(Ystemp if neg == 1 else neg * Ystemp)
+    return [M, Ystemp, size, messages, [t1 - t0, time.perf_counter() - t1]]
+
+
+def _record_file_stages(timings, results, column):
+    '''adds the per-file [parse, filter] seconds held in results[:][column] to timings'''
+    if timings is not None:
+        timings.record('parse', sum(r[column][0] for r in results), len(results))
+        timings.record('filter', sum(r[column][1] for r in results), len(results))
+        timings.lap()
+
+
+def _stack(arrays):
+    '''stacks equally shaped arrays into a single array, leaving the list untouched otherwise'''
+    if arrays and all(np.shape(a) == np.shape(arrays[0]) for a in arrays):
+        return np.stack(arrays)
+    return arrays
+
+
+def _check_ref(ref, Ms, output=0):
+    '''reports every reference parameter in ref missing from the read parameters Ms, a list or a ScanIndex'''
     if ref:
+        Mcheck = Ms if isinstance(Ms, ScanIndex) else {float(f'{M:.1e}') for M in Ms}
         for m in ref:
-            ms = f'{m:.1e}'
-            if float(ms) in Mcheck:
+            if (m in Mcheck) if isinstance(Mcheck, ScanIndex) else (float(f'{m:.1e}') in Mcheck):
                 pass
             else:
                 if output != 1:
                     print(f'Missing mass {m} detected')
+
+
+class ScanIndex:
+    '''parameter index of a scan directory, built with a single os.scandir pass
+
+    path is the prefix read() globs (a folder ending in a separator, optionally followed
+    by the start of the file names). Every regular, non-hidden file under it is parsed
+    as float(name[:length]); listing keeps the [parameter, filename] pairs in directory
+    order, params/files are sorted for range queries and the exact parameters are hashed
+    for master lookups. Membership (m in index) compares at the 1.1e precision of ref.
+
+    An index is a snapshot: read() and read1D() build a new one per call unless one is
+    passed as index=, which is how repeated reads of an unchanged directory skip the
+    listing. stat = True also keeps (size, mtime_ns) per file in stats, from the same pass.
+    '''
+
+    def __init__(self, path, length=9, stat=False):
+        folder, prefix = os.path.split(path)
+        head = path[:len(path) - len(prefix)]
+        self.path, self.length = path, length
+        self.listing, self.unparsed, self.stats = [], [], {}
+        try:
+            with os.scandir(folder or '.') as it:
+                for entry in it:
+                    if entry.name.startswith('.') or not entry.name.startswith(prefix) or not entry.is_file():
+                        continue
+                    filename = head + entry.name
+                    try:
+                        self.listing.append([float(entry.name[:length]), filename])
+                    except ValueError:
+                        self.unparsed.append(filename)
+                        continue
+                    if stat:
+                        st = entry.stat()
+                        self.stats[filename] = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        ordered = sorted(self.listing, key=lambda it: it[0])
+        self.params = np.array([it[0] for it in ordered], dtype=float)
+        self.files = [it[1] for it in ordered]
+        self._exact = {}
+        for M, filename in ordered:
+            self._exact.setdefault(M, filename)
+        self._rounded = {float(f'{M:.1e}') for M in self.params}
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, m):
+        return float(f'{m:.1e}') in self._rounded
+
+    def lookup(self, m):
+        '''file for parameter m: the file whose parameter is exactly m, else the <m:.1e>.txt name read() always built'''
+        #never another parameter's file, a missing one fails on reading as it always did
+        return self._exact.get(float(m), self.path + f'{m:.1e}' + '.txt')
+
+    def range(self, lo=-np.inf, hi=np.inf):
+        '''[parameters, files] with lo <= parameter <= hi'''
+        start, stop = np.searchsorted(self.params, lo, side='left'), np.searchsorted(self.params, hi, side='right')
+        return [self.params[start:stop].tolist(), self.files[start:stop]]
+
+    def iterable(self, master=[]):
+        '''[parameter, filename] pairs for read(): master looked up in order, else every file in directory order'''
+        if master != []:
+            return [[float(m), self.lookup(m)] for m in master]
+        if self.unparsed:
+            raise ValueError(f'could not parse a parameter from the first {self.length} characters of {self.unparsed[0]!r}')
+        return [list(it) for it in self.listing]
+
+
+class ScanDataset:
+    '''lazy, sorted view of a scan directory, as returned by read(..., lazy = True)
+
+    Files are parsed (or memory-mapped from the cache) on first access and kept in an
+    LRU store bounded by maxBytes. Indexing with an int gives that file's array, slicing
+    or range() gives a new dataset sharing the same store.
+    '''
+
+    def __init__(self, iterable, maxBytes=2**30, **readArgs):
+        #iterable holds [parameter, filename] pairs, readArgs are passed on to _read_file
+        iterable = sorted(iterable, key=lambda it: it[0])
+        self.params = np.array([it[0] for it in iterable], dtype=float)
+        self.files = [it[1] for it in iterable]
+        self.maxBytes = maxBytes
+        self._readArgs = readArgs
+        self._store = OrderedDict()
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._subset(range(len(self))[i])
+        filename = self.files[i]
+        if filename in self._store:
+            self._store.move_to_end(filename)
+            return self._store[filename]
+        M, Ystemp, _, messages, _ = _read_file([self.params[i], filename], **self._readArgs)
+        for msg in messages:
+            print(msg)
+        self._store[filename] = Ystemp
+        resident = sum(a.nbytes for a in self._store.values())
+        while resident > self.maxBytes and len(self._store) > 1:
+            resident -= self._store.popitem(last=False)[1].nbytes
+        return Ystemp
+
+    def _subset(self, indices):
+        sub = ScanDataset([], maxBytes=self.maxBytes, **self._readArgs)
+        sub.params = self.params[list(indices)]
+        sub.files = [self.files[i] for i in indices]
+        sub._store = self._store
+        return sub
+
+    def range(self, lo=-np.inf, hi=np.inf):
+        '''files with lo <= parameter <= hi'''
+        start, stop = np.searchsorted(self.params, lo, side='left'), np.searchsorted(self.params, hi, side='right')
+        return self._subset(range(start, stop))
+
+    def series(self, col):
+        '''column col of every file, as the list of arrays difplot expects'''
+        #single-column files come back from _read_file as 1D arrays and only have column 0
+        out = []
+        for a in self:
+            if a.ndim == 1:
+                if col != 0:
+                    raise ValueError(f'scan files hold a single column, cannot take column {col!r}')
+                out.append(a)
+            else:
+                out.append(a[:, col])
+        return out
+
+
+def read(path,master = [],output = 0,dtype = float,mi = 10000,length = 9,neg = 1, ref = [],size = None,workers = None,pool = 'process',stack = False,cache = None,parser = 'genfromtxt',lazy = False,maxBytes = 2**30,timings = None,index = None):
+    '''reads a directory of scan files named by their parameter value, returns [M, Y]'''
+    #workers > 1 loads the files in parallel on a thread or process pool ('pool'), the output is identical to a serial read
+    #diagnostics are collected per file and printed in file order once loading is done
+    #with pool = 'process', scripts on spawn-based platforms need the usual if __name__ == '__main__' guard
+    #cache = True (or a folder) keeps a binary copy of every parsed file and only re-parses files whose size or mtime changed
+    #parser picks the text parser: 'genfromtxt' (default) or 'loadtxt', numpy's C reader, for files without missing values
+    #each entry of Y is an ndarray of the kept rows, stack = True returns Y as one 3D array when every file has the same shape
+    #lazy = True returns a ScanDataset instead, loading files on access with at most maxBytes of them kept in memory;
+    #with cache set the cached files are memory-mapped, and size (if None) is taken per file rather than from the first one
+    #timings = Timings() records the discover, parse, filter, sort and stack stages
+    _lap(timings)
+    Ys = []
+    Mtemp = []
+    filetemp = ''
+    #files come from a ScanIndex of path, built for this call unless index passes one to reuse
+    #(e.g. for repeated reads of a directory nothing is added to or removed from); master values are looked up in it
+    if index is None:
+        index = ScanIndex(path, length)
+    iterable = index.iterable(master)
+    sort = master == []
+    _lap(timings, 'discover', len(iterable))
+    if lazy:
+        _check_ref(ref, [it[0] for it in iterable] if master != [] else index, output)
+        return ScanDataset(iterable, maxBytes=maxBytes, dtype=dtype, mi=mi, size=size, neg=neg, output=output, cache=cache, parser=parser, mmap=bool(cache))
+    results = []
+    if iterable and size is None:
+        #the first file fixes size for every other file
+        results.append(_read_file(iterable[0], dtype=dtype, mi=mi, size=size, neg=neg, output=output, cache=cache, parser=parser))
+        size = results[0][2]
+        iterable_rest = iterable[1:]
+    else:
+        iterable_rest = iterable
+    results += _pool_map(partial(_read_file, dtype=dtype, mi=mi, size=size, neg=neg, output=output, cache=cache, parser=parser), iterable_rest, workers, pool)
+    for M, Ystemp, _, messages, _ in results:
+        for msg in messages:
+            print(msg)
+        Mtemp.append(M)
+        Ys.append(Ystemp)
+    _record_file_stages(timings, results, 4)
+    _check_ref(ref, Mtemp if master != [] else index, output)
     if sort:
         sorted_indices = sorted(range(len(Mtemp)), key=lambda i: Mtemp[i])
-        Msorted = [Mtemp[i] for i in sorted_indices]
-        Ysorted = [Ys[i] for i in sorted_indices]
-        return [Msorted, Ysorted]
+        Mtemp = [Mtemp[i] for i in sorted_indices]
+        Ys = [Ys[i] for i in sorted_indices]
+        _lap(timings, 'sort', len(Mtemp))
+    if stack:
+        Ys = _stack(Ys)
+        _lap(timings, 'stack', len(Mtemp))
+    return [Mtemp, Ys]
+
+
+class ScanReader:
+    '''incremental read() of a scan directory that solvers keep writing into
+
+    Every file parsed is remembered by name, size and mtime. refresh() lists the directory
+    again in one os.scandir pass (a ScanIndex with stat = True, so hidden files, directories
+    and names that do not parse are skipped as in read()) and parses only files that are new
+    or changed, drops deleted ones and merges the rest into the sorted M and Y lists by
+    bisection. A refresh costs a directory listing plus the parsing of what actually changed.
+    The keyword arguments are those of read(); index holds the listing of the last refresh.
+    '''
+
+    def __init__(self, path, output=0, dtype=float, mi=10000, length=9, neg=1, size=None, workers=None, pool='process', cache=None, parser='genfromtxt', timings=None):
+        self.path, self.length, self.size = path, length, size
+        self.workers, self.pool, self.timings = workers, pool, timings
+        self._readArgs = {'dtype': dtype, 'mi': mi, 'neg': neg, 'output': output, 'cache': cache, 'parser': parser}
+        self.M, self.Y, self.files = [], [], []
+        #added and removed hold the parameters parsed and dropped by the last refresh (a changed file is in both)
+        self.added, self.removed = [], []
+        self.index = None
+        self._stamps = {}
+
+    def __len__(self):
+        return len(self.M)
+
+    def _remove(self, filename):
+        M = self._stamps.pop(filename)[1]
+        i = bisect.bisect_left(self.M, M)
+        while self.files[i] != filename:
+            i += 1
+        del self.M[i], self.Y[i], self.files[i]
+        return M
+
+    def refresh(self):
+        '''parses new and changed files, forgets deleted ones, returns [M, Y] sorted by parameter'''
+        _lap(self.timings)
+        self.index = ScanIndex(self.path, self.length, stat=True)
+        current = self.index.stats
+        iterable = [[M, f] for M, f in self.index.listing if f not in self._stamps or self._stamps[f][0] != current[f]]
+        changed = [f for M, f in iterable]
+        gone = [f for f in self._stamps if f not in current]
+        _lap(self.timings, 'discover', len(current))
+
+        self.removed = [self._remove(f) for f in gone + [f for f in changed if f in self._stamps]]
+        results = []
+        if iterable and self.size is None:
+            #the first file ever parsed fixes size, as in read()
+            results.append(_read_file(iterable[0], size=None, **self._readArgs))
+            self.size = results[0][2]
+            iterable = iterable[1:]
+        results += _pool_map(partial(_read_file, size=self.size, **self._readArgs), iterable, self.workers, self.pool)
+        _record_file_stages(self.timings, results, 4)
+
+        self.added = []
+        for (M, Ystemp, _, messages, _), filename in zip(results, changed):
+            for msg in messages:
+                print(msg)
+            i = bisect.bisect_right(self.M, M)
+            self.M.insert(i, M)
+            self.Y.insert(i, Ystemp)
+            self.files.insert(i, filename)
+            self._stamps[filename] = (current[filename], M)
+            self.added.append(M)
+        _lap(self.timings, 'sort', len(self.added))
+        return [list(self.M), list(self.Y)]
+
+
+def _read1D_file(it, dtype=float, output=0, cache=None, parser='genfromtxt'):
+    '''reads a single scan file for read1D(), returns [fileVal, data, messages, [parse seconds, filter seconds]] with data None if it holds a NaN'''
+    messages = []
+    fileVal, nameString = it[0], f'{it[0]:.1e}'
+    if output == 3:
+        messages.append(f'Reading file {nameString}')
+
+    t0 = time.perf_counter()
+    data = _load(it[1], dtype=dtype, cache=cache, parser=parser)
+    t1 = time.perf_counter()
+    if np.size(data) != 1:
+        nantag = False
+        for i in range(0, np.size(data)):
+            if np.issubdtype(np.dtype(dtype), np.complexfloating):
+                data[i] = float(data[i].real)
+            if np.isnan(data[i]):
+                if output != 1:
+                    messages.append(f'Nan detected in {nameString}')
+                nantag = True
+        if nantag:
+            data = None
     else:
-        return [Mtemp, Ys]
+        if np.issubdtype(np.dtype(dtype), np.complexfloating):
+            data = float(data.real)
+
+        if np.isnan(data):
+            if output != 1:
+                messages.append(f'Nan detected in {nameString}')
+            data = None
+    return [fileVal, data, messages, [t1 - t0, time.perf_counter() - t1]]
+
     
-def read1D(path,master = [],output = 0,dtype = float,mi = 10000,correct = False,length = 9,neg = 1, ref = []):
+def read1D(path,master = [],output = 0,dtype = float,mi = 10000,correct = False,length = 9,neg = 1, ref = [],workers = None,pool = 'process',cache = None,parser = 'genfromtxt',timings = None,index = None):
+    '''reads scalar or 1D values stored one file per parameter point, returns [values, parameters]'''
+    #master, ref, workers, pool, cache, parser, timings and index behave as in read()
+    _lap(timings)
     vals,fileVals = [],[]
-    filetemp,iterable = '',[]
-    
-    for filename in glob.glob(path + "*"):
-        name = os.path.basename(filename)[:length]
-        iterable.append([float(name), filename])
+    filetemp = ''
+    if index is None:
+        index = ScanIndex(path, length)
+    iterable = index.iterable(master)
     sort = True
-    for it in iterable:
-        valstemp = []
-        fileVal, nameString = it[0], f'{it[0]:.1e}'
-        if output == 3:
-            print(f'Reading file {nameString}')
-
-        data = np.genfromtxt(it[1], dtype=dtype)
-        if np.size(data) != 1:
-            nantag = False
-            for i in range(0, np.size(data)):
-                if np.issubdtype(np.dtype(dtype), np.complexfloating):
-                    data[i] = float(data[i].real)
-                if np.isnan(data[i]):
-                    if output != 1:
-                        print(f'Nan detected in {nameString}')
-                    nantag = True
-            if not nantag:
-                vals.append(data)
-                fileVals.append(fileVal)
-        else:
-            if np.issubdtype(np.dtype(dtype), np.complexfloating):
-                data = float(data.real)
-
-            if np.isnan(data):
-                if output != 1:
-                    print(f'Nan detected in {nameString}')
-                pass
-            else:
-                vals.append(data)
-                fileVals.append(fileVal)
+    _lap(timings, 'discover', len(iterable))
+    results = _pool_map(partial(_read1D_file, dtype=dtype, output=output, cache=cache, parser=parser), iterable, workers, pool)
+    for fileVal, data, messages, _ in results:
+        for msg in messages:
+            print(msg)
+        if data is not None:
+            vals.append(data)
+            fileVals.append(fileVal)
+    _record_file_stages(timings, results, 3)
+    _check_ref(ref, fileVals if master != [] else index, output)
     sorted_indices = sorted(range(len(fileVals)), key=lambda i: fileVals[i])
     valSorted = [vals[i] for i in sorted_indices]
     fileSorted = [fileVals[i] for i in sorted_indices]
+    _lap(timings, 'sort', len(fileSorted))
     return [valSorted,fileSorted]
     
 
 
 
-def sample(data, N, tol=1e-3, maxD=np.inf, max_iter=50,even = 100):
+def _enforce_maxD(x, idx, maxD):
     """
-    Downsample a 2D array [x, y] into N points preserving behaviour of y(x).
-    Always covers full x-range and enforces maxD spacing.
+    Insert indices between consecutive entries of idx so that no step in x exceeds maxD.
 
-    Parameters
-    ----------
-    data : np.ndarray
-        Input array of shape (M, 2) with columns [x, y].
-    N : int
-        Number of output points (N > 2).
-    tol : float
-        Initial tolerance guess (will be adapted).
-    maxD : float
-        Maximum allowed difference in x between consecutive points.
-    max_iter : int
-        Maximum number of iterations to adjust tolerance.
+    From each kept point the next inserted point is the first x at or beyond x + maxD,
+    repeated until the gap to the following kept point is small enough (or no data
+    point lies in between). All gaps are stepped together, one np.searchsorted call
+    per step, which gives exactly the indices of the point-by-point loop.
+    """
+    idx = np.asarray(idx)
+    if len(idx) < 2 or not np.isfinite(maxD):
+        return idx
+    cur, end = idx[:-1], idx[1:]
+    gap = x[end] - x[cur] > maxD
+    cur, end = cur[gap], end[gap]
+    inserted = [idx]
+    while cur.size:
+        mid = np.searchsorted(x, x[cur] + maxD)
+        ok = (mid < end) & (mid > cur)
+        cur, end = mid[ok], end[ok]
+        inserted.append(cur)
+        gap = x[end] - x[cur] > maxD
+        cur, end = cur[gap], end[gap]
+    if len(inserted) == 1:
+        return idx
+    return np.sort(np.concatenate(inserted))
 
-    Returns
-    -------
-    np.ndarray
-        Downsampled array of shape (N, 2).
+
+def _sample_cdf(x, y, N, tol=1e-3, maxD=np.inf, max_iter=50, slope=None):
     """
-    x, y = data[:, 0], data[:, 1]
+    Indices for sample(method='cdf'): slope-weighted CDF selection with a bisection
+    over tol until exactly N points remain after maxD enforcement.
 
+    slope (|dy/dx| between neighbours) does not depend on tol, so it is computed once
+    here, or passed in by sample_many() when it was computed for a whole stack of curves.
+    """
+    if slope is None:
+        slope = np.abs(np.diff(y) / np.diff(x))
     def select_points(curr_tol):
-        dx = np.diff(x)
-        dy = np.diff(y)
-        slope = np.abs(dy / dx)
-
         # emphasize steep slopes
         weights = slope / (curr_tol + slope)
         weights /= np.sum(weights)
@@ -648,16 +1461,7 @@ def sample(data, N, tol=1e-3, maxD=np.inf, max_iter=50,even = 100):
         idx = select_points(used_tol)
 
         # enforce maxD strictly
-        enforced = [idx[0]]
-        for j in idx[1:]:
-            while x[j] - x[enforced[-1]] > maxD:
-                # insert closest index satisfying maxD
-                mid = np.searchsorted(x, x[enforced[-1]] + maxD)
-                if mid >= j:  # avoid infinite loop
-                    break
-                enforced.append(mid)
-            enforced.append(j)
-        idx = np.array(enforced)
+        idx = _enforce_maxD(x, idx, maxD)
 
         # check constraints
         if len(idx) == N and np.all(np.diff(x[idx]) <= maxD) and x[idx[0]] == x[0] and x[idx[-1]] == x[-1]:
@@ -676,16 +1480,8 @@ def sample(data, N, tol=1e-3, maxD=np.inf, max_iter=50,even = 100):
     if final_idx is None:
         idx = select_points(used_tol)
         # enforce range and maxD again
-        enforced = [0]
-        for j in idx[1:]:
-            while x[j] - x[enforced[-1]] > maxD:
-                mid = np.searchsorted(x, x[enforced[-1]] + maxD)
-                if mid >= j:
-                    break
-                enforced.append(mid)
-            enforced.append(j)
-        enforced[-1] = len(x)-1
-        idx = np.array(enforced)
+        idx = _enforce_maxD(x, idx, maxD)
+        idx[0], idx[-1] = 0, len(x)-1
 
         # trim/pad to exactly N while keeping range + maxD
         if len(idx) > N:
@@ -695,16 +1491,179 @@ def sample(data, N, tol=1e-3, maxD=np.inf, max_iter=50,even = 100):
             extra = np.linspace(0, len(x)-1, N, dtype=int)
             final_idx = np.unique(np.sort(np.concatenate([idx, extra])))[:N]
 
-    for j in range(1,even):
-        index = int( j*((np.size(y)-1)/even))
-        if index not in final_idx:
-            final_idx = np.append(final_idx,index)
-            
-    for j in range(1,10):
-        index,indexm = j,int( (np.size(y)-1) - j)
-        if index not in final_idx:
-            final_idx = np.append(final_idx,index)
-            
-            
-    final_idx = sorted(final_idx)
-    return data[final_idx]
+    return final_idx
+
+
+def _lttb_idx(x, y, N):
+    """
+    Indices for sample(method='lttb'): Largest-Triangle-Three-Buckets.
+
+    The interior points are split into N - 2 buckets and each bucket keeps the point
+    spanning the largest triangle with the previously kept point and the mean of the
+    next bucket. O(M).
+    """
+    M = len(x)
+    if N >= M or N < 3:
+        return np.arange(M) if N >= M else np.array([0, M-1])
+    edges = np.linspace(1, M-1, N-1).astype(int)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:M-1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:M-1], edges[:-1] - 1) / counts
+    idx = np.empty(N, dtype=int)
+    idx[0], idx[-1] = 0, M-1
+    a = 0
+    for i in range(N-2):
+        lo, hi = edges[i], edges[i+1]
+        if i < N-3:
+            cx, cy = mean_x[i+1], mean_y[i+1]
+        else:
+            cx, cy = x[M-1], y[M-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i+1] = a
+    return idx
+
+
+def _minmax_idx(x, y, N):
+    """
+    Indices for sample(method='minmax'): the first, last, minimum and maximum point of
+    each of N // 4 equal-width x buckets (M4), so every extreme is drawn. O(M).
+    """
+    M = len(x)
+    if N >= M:
+        return np.arange(M)
+    nb = max(N // 4, 1)
+    span = x[-1] - x[0]
+    bucket = np.zeros(M, dtype=int) if span <= 0 else np.minimum(((x - x[0]) / span * nb).astype(int), nb-1)
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    counts = np.diff(np.append(starts, M))
+    ids = np.repeat(np.arange(len(starts)), counts)
+    picks = [starts, starts + counts - 1]
+    for extreme in (np.minimum, np.maximum):
+        hit = np.flatnonzero(y == np.repeat(extreme.reduceat(y, starts), counts))
+        picks.append(hit[np.unique(ids[hit], return_index=True)[1]])
+    return np.unique(np.concatenate(picks))
+
+
+def _dp_idx(x, y, N):
+    """
+    Indices for sample(method='dp'): Douglas-Peucker with a point budget.
+
+    Starting from the two end points, the segment whose worst point lies furthest
+    (vertically) from its chord is split at that point, largest first, until N points
+    are kept. O(M log N) for typical curves.
+    """
+    M = len(x)
+    if N >= M:
+        return np.arange(M)
+    heap, keep = [], [0, M-1]
+
+    def push(a, b):
+        if b - a < 2:
+            return
+        xs, ys = x[a+1:b], y[a+1:b]
+        if x[b] != x[a]:
+            d = np.abs(ys - (y[a] + (y[b] - y[a]) * (xs - x[a]) / (x[b] - x[a])))
+        else:
+            d = np.abs(ys - y[a])
+        k = int(np.argmax(d))
+        heapq.heappush(heap, (-d[k], a, b, a + 1 + k))
+
+    push(0, M-1)
+    while heap and len(keep) < N:
+        _, a, b, k = heapq.heappop(heap)
+        keep.append(k)
+        push(a, k)
+        push(k, b)
+    return np.unique(keep)
+
+
+_SAMPLERS = {'lttb': _lttb_idx, 'minmax': _minmax_idx, 'dp': _dp_idx}
+
+
+def sample(data, N, tol=1e-3, maxD=np.inf, max_iter=50,even = 100, method = 'cdf'):
+    """
+    Downsample a 2D array [x, y] into N points preserving behaviour of y(x).
+    Always covers full x-range and enforces maxD spacing.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Input array of shape (M, 2) with columns [x, y].
+    N : int
+        Number of output points (N > 2).
+    tol : float
+        Initial tolerance guess (will be adapted).
+    maxD : float
+        Maximum allowed difference in x between consecutive points.
+    max_iter : int
+        Maximum number of iterations to adjust tolerance.
+    even : int
+        Number of evenly spaced anchor intervals always kept.
+    method : str
+        'cdf' (default) places points along the slope-weighted CDF, bisecting tol
+        until exactly N points survive the maxD enforcement. The single-pass
+        alternatives pick about N points before maxD and anchors are added:
+        'lttb' (Largest-Triangle-Three-Buckets), 'minmax' (first/last/min/max per
+        x bucket, M4) and 'dp' (Douglas-Peucker with a point budget).
+
+    Returns
+    -------
+    np.ndarray
+        Downsampled array of shape (N, 2) ('cdf'), plus the anchor points.
+    """
+    return data[_sample_idx(data[:, 0], data[:, 1], N, tol=tol, maxD=maxD, max_iter=max_iter, even=even, method=method)]
+
+
+def _sample_idx(x, y, N, tol=1e-3, maxD=np.inf, max_iter=50, even=100, method='cdf', slope=None):
+    """
+    Row indices kept by sample(), see there for the parameters. slope is an optional
+    precomputed |dy/dx| for method='cdf'.
+    """
+    if method == 'cdf':
+        final_idx = _sample_cdf(x, y, N, tol=tol, maxD=maxD, max_iter=max_iter, slope=slope)
+    elif method in _SAMPLERS:
+        final_idx = _enforce_maxD(x, _SAMPLERS[method](x, y, N), maxD)
+    else:
+        raise ValueError(f"method must be 'cdf', 'lttb', 'minmax' or 'dp', got {method!r}")
+
+    # merge in the even anchors and the first edge points in a single sorted union
+    last = np.size(y) - 1
+    anchors = (np.arange(1, even) * (last / even)).astype(int)
+    edges = np.arange(1, min(10, last + 1))
+    return np.union1d(final_idx, np.concatenate((anchors, edges)))
+
+
+def sample_many(curves, N, tol=1e-3, maxD=np.inf, max_iter=50, even=100, method='cdf', workers=None, pool='process'):
+    """
+    Downsample many [x, y] curves at once, e.g. every curve returned by read().
+
+    Only an (n, M, 2) stack whose curves share one x grid gets shared vectorized
+    work, and only for the slopes of method='cdf'. The point selection still runs per
+    curve, and a list of curves (what read() returns) is a plain per-curve loop, so the
+    gain there comes from workers.
+
+    Parameters
+    ----------
+    curves : list of np.ndarray or np.ndarray
+        Curves of shape (M_i, 2), or a stack of shape (n, M, 2).
+    N, tol, maxD, max_iter, even, method :
+        As in sample(), applied to every curve.
+    workers : int, optional
+        Spread the curves over a thread or process pool ('pool') of this size.
+
+    Returns
+    -------
+    list of np.ndarray
+        One downsampled array per curve, identical to calling sample() on each.
+    """
+    if workers and workers > 1:
+        return _pool_map(partial(sample, N=N, tol=tol, maxD=maxD, max_iter=max_iter, even=even, method=method), curves, workers, pool)
+    slopes = [None] * len(curves)
+    if method == 'cdf' and isinstance(curves, np.ndarray) and curves.ndim == 3 and len(curves):
+        # a stack on one shared x grid gets all of its slopes in one array operation
+        x = curves[0, :, 0]
+        if np.array_equal(curves[:, :, 0], np.broadcast_to(x, curves.shape[:2])):
+            slopes = np.abs(np.diff(curves[:, :, 1], axis=1) / np.diff(x))
+    return [c[_sample_idx(c[:, 0], c[:, 1], N, tol=tol, maxD=maxD, max_iter=max_iter, even=even, method=method, slope=sl)]
+            for c, sl in zip(curves, slopes)]